@@ -7,14 +7,146 @@ Computes Bayesian evidence and posterior distributions
 for the oscillating brane dark matter theory compared to ΛCDM.
 """
 
-from typing import Dict, Optional, Tuple
+import argparse
+import hashlib
+import os
+import time
+from functools import partial
+from multiprocessing import Pool
+from typing import Callable, Dict, Optional, Tuple, Union
 
 import corner
 import emcee
 import matplotlib.pyplot as plt
 import numpy as np
+from evidence import laplace_approximation, nested_sampling, parallel_tempering
+from hmc import hmc
+from likelihoods import DATASET_REGISTRY, DatasetLikelihood, build_datasets
+from mcmc_backend import NpyBackend, read_chain
 from scipy import stats
-from scipy.special import loggamma
+from scipy.special import expit, loggamma, logsumexp
+
+# Steps discarded as burn-in when τ has not been estimated
+DEFAULT_BURN_IN = 1000
+
+
+def _in_box(
+    theta: np.ndarray, names: list, ranges: Dict[str, Tuple[float, float]]
+) -> np.ndarray:
+    """
+    Whether each parameter vector lies inside the prior box.
+
+    theta has shape (..., ndim) with columns ordered as `names`.
+    """
+    inside = np.ones(theta.shape[:-1], dtype=bool)
+    for i, name in enumerate(names):
+        low, high = ranges[name]
+        inside &= (low <= theta[..., i]) & (theta[..., i] <= high)
+    return inside
+
+
+def _scalar_or_array(values: np.ndarray, theta: np.ndarray):
+    """Return a float for a single parameter vector, else the array."""
+    return float(values) if theta.ndim == 1 else values
+
+
+def block_jackknife_log_mean_exp(
+    log_values: np.ndarray, n_blocks: int = 100
+) -> Tuple[float, float]:
+    """
+    log mean(exp(x)) and its block-jackknife error.
+
+    The samples are split into n_blocks contiguous blocks along the first
+    (step) axis, which is read one block at a time, so `log_values` may be
+    a memory-mapped chain. The leave-one-block-out estimates follow from
+    the per-block log-sum-exps through prefix and suffix log-sums in
+    O(n + B), and the error is sqrt(B - 1) times their standard deviation.
+
+    Parameters
+    ----------
+    log_values : array
+        Shape (n_steps, ...), e.g. log-probabilities (n_steps, nwalkers)
+    n_blocks : int
+        Number of jackknife blocks B (at most n_steps)
+
+    Returns
+    -------
+    log_mean : float
+        log of the mean of exp(log_values)
+    error : float
+        Block-jackknife standard error of log_mean
+    """
+    n_steps = len(log_values)
+    n_blocks = min(n_blocks, n_steps)
+    edges = np.linspace(0, n_steps, n_blocks + 1).astype(int)
+
+    # Per-block log-sum-exp and sample count
+    block_lse = np.empty(n_blocks)
+    block_n = np.empty(n_blocks)
+    for b in range(n_blocks):
+        block = np.asarray(log_values[edges[b] : edges[b + 1]])
+        block_lse[b] = logsumexp(block)
+        block_n[b] = block.size
+    n = block_n.sum()
+    log_mean = np.logaddexp.reduce(block_lse) - np.log(n)
+    if n_blocks < 2:
+        return float(log_mean), np.nan
+
+    # Log-sum over all blocks except b, without cancellation
+    prefix = np.logaddexp.accumulate(np.concatenate([[-np.inf], block_lse[:-1]]))
+    suffix = np.logaddexp.accumulate(np.concatenate([[-np.inf], block_lse[:0:-1]]))[
+        ::-1
+    ]
+    loo = np.logaddexp(prefix, suffix) - np.log(n - block_n)
+
+    error = np.sqrt(n_blocks - 1) * np.std(loo)
+    return float(log_mean), float(error)
+
+
+# Analyzer installed once per pool worker by `_init_worker`
+_worker_analyzer = None
+
+
+def _init_worker(analyzer: "BayesianAnalyzer"):
+    """Pool initializer: keep the analyzer for all tasks of this worker."""
+    global _worker_analyzer
+    _worker_analyzer = analyzer
+
+
+def _call_worker(method: str, theta: np.ndarray):
+    """Evaluate a method of the worker's analyzer, e.g. 'log_posterior_osc'."""
+    return getattr(_worker_analyzer, method)(theta)
+
+
+def _hash_data(data: Dict[str, np.ndarray]) -> str:
+    """SHA-256 of the data arrays, identifying the data a chain was run on."""
+    digest = hashlib.sha256()
+    for key in sorted(data):
+        digest.update(key.encode())
+        values = data[key]
+        for value in values if isinstance(values, (tuple, list)) else [values]:
+            digest.update(np.ascontiguousarray(value, dtype=float).tobytes())
+    return digest.hexdigest()
+
+
+class _ChunkedLogProb:
+    """
+    Vectorized log-probability whose walker ensemble is split across a pool.
+
+    Called by emcee in the main process with all walkers at once; each pool
+    worker evaluates one contiguous chunk with the vectorized function. The
+    function should be cheap to pickle, e.g. `_call_worker` bound to a
+    method name, since it is sent along with every chunk.
+    """
+
+    def __init__(self, log_prob_fn: Callable, pool: Pool, n_chunks: int):
+        self.log_prob_fn = log_prob_fn
+        self.pool = pool
+        self.n_chunks = n_chunks
+
+    def __call__(self, theta: np.ndarray) -> np.ndarray:
+        chunks = np.array_split(theta, self.n_chunks)
+        return np.concatenate(self.pool.map(self.log_prob_fn, chunks))
 
 
 class BayesianAnalyzer:
@@ -32,10 +164,11 @@ class BayesianAnalyzer:
             Dictionary containing:
             - 'H0_samples': Samples from H0 measurements
             - 'S8_samples': Samples from S8 measurements
-            - 'w_measurements': (z, w, err) for dark energy EOS
+            - 'w_measurements': (z, w, err) for dark energy EOS, or
+              (z, w, cov) with a full covariance matrix
+            Every key registered in `likelihoods.DATASET_REGISTRY` becomes a
+            dataset likelihood; more can be added with `add_dataset`.
         """
-        self.data = data
-
         # Model parameters and priors
         self.param_names_osc = ["tau_0", "f_osc", "T", "A_w"]
         self.param_names_lcdm = ["H0", "Omega_m"]
@@ -53,160 +186,406 @@ class BayesianAnalyzer:
             "Omega_m": (0.25, 0.35),  # matter fraction
         }
 
-    def log_prior_osc(self, theta: np.ndarray) -> float:
+        # Parameters with log-uniform priors; all others are uniform
+        self.log_uniform_params = ["tau_0"]
+
+        # Dataset likelihoods, prepared once; the raw measurements are not
+        # kept, so that pickles sent to pool workers stay small
+        self.datasets = build_datasets(data)
+        self.data_hash = _hash_data(data)
+        self.data = {
+            key: value for key, value in data.items() if key not in DATASET_REGISTRY
+        }
+
+    def add_dataset(self, dataset: DatasetLikelihood):
+        """
+        Add a dataset likelihood (e.g. BAO or SN) to both models.
+
+        Parameters
+        ----------
+        dataset : DatasetLikelihood
+            Dataset with a theory function for every model it constrains
+        """
+        if not dataset.prepared:
+            dataset.prepare()
+        self.datasets.append(dataset)
+        self.data_hash = hashlib.sha256(
+            (self.data_hash + dataset.name).encode()
+        ).hexdigest()
+
+    def _log_likelihood(self, model: str, theta: np.ndarray):
+        """Sum of all dataset log likelihoods for parameter vectors theta."""
+        theta = np.asarray(theta, dtype=float)
+        log_like = np.zeros(theta.shape[:-1])
+        for dataset in self.datasets:
+            log_like += dataset.log_likelihood(model, theta)
+        return _scalar_or_array(log_like, theta)
+
+    def log_prior_osc(self, theta: np.ndarray) -> Union[float, np.ndarray]:
         """
         Log prior for oscillating brane model.
 
         Parameters
         ----------
         theta : array
-            Parameter vector [tau_0, f_osc, T, A_w]
+            Parameter vector [tau_0, f_osc, T, A_w], or an array of shape
+            (n, 4) of such vectors
 
         Returns
         -------
-        log_prior : float
-        """
-        tau_0, f_osc, T, A_w = theta
-
-        # Check bounds
-        if not (
-            self.prior_ranges_osc["tau_0"][0]
-            <= tau_0
-            <= self.prior_ranges_osc["tau_0"][1]
-        ):
-            return -np.inf
-        if not (
-            self.prior_ranges_osc["f_osc"][0]
-            <= f_osc
-            <= self.prior_ranges_osc["f_osc"][1]
-        ):
-            return -np.inf
-        if not (self.prior_ranges_osc["T"][0] <= T <= self.prior_ranges_osc["T"][1]):
-            return -np.inf
-        if not (
-            self.prior_ranges_osc["A_w"][0] <= A_w <= self.prior_ranges_osc["A_w"][1]
-        ):
-            return -np.inf
+        log_prior : float or array
+            Scalar for a single vector, shape (n,) otherwise
+        """
+        theta = np.asarray(theta, dtype=float)
+        inside = _in_box(theta, self.param_names_osc, self.prior_ranges_osc)
 
         # Log-uniform prior on tau_0, uniform on others
-        log_prior = -np.log(tau_0)
+        tau_0 = np.where(inside, theta[..., 0], 1.0)
+        log_prior = np.where(inside, -np.log(tau_0), -np.inf)
 
-        return log_prior
+        return _scalar_or_array(log_prior, theta)
 
-    def log_likelihood_osc(self, theta: np.ndarray) -> float:
+    def log_likelihood_osc(self, theta: np.ndarray) -> Union[float, np.ndarray]:
         """
         Log likelihood for oscillating brane model.
 
         Parameters
         ----------
         theta : array
-            Parameter vector [tau_0, f_osc, T, A_w]
+            Parameter vector [tau_0, f_osc, T, A_w], or an array of shape
+            (n, 4) of such vectors
 
         Returns
         -------
-        log_like : float
+        log_like : float or array
+            Scalar for a single vector, shape (n,) otherwise
         """
-        tau_0, f_osc, T, A_w = theta
+        return self._log_likelihood("oscillating", theta)
 
-        log_like = 0
+    def log_posterior_osc(self, theta: np.ndarray) -> Union[float, np.ndarray]:
+        """
+        Log posterior for oscillating brane model; accepts (n, 4) arrays.
+        """
+        lp = self.log_prior_osc(theta)
+        if np.ndim(lp) == 0:
+            if not np.isfinite(lp):
+                return -np.inf
+            return lp + self.log_likelihood_osc(theta)
+        return np.where(np.isfinite(lp), lp + self.log_likelihood_osc(theta), -np.inf)
+
+    def log_prior_lcdm(self, theta: np.ndarray) -> Union[float, np.ndarray]:
+        """
+        Log prior for ΛCDM model; accepts (n, 2) arrays.
+        """
+        theta = np.asarray(theta, dtype=float)
+        inside = _in_box(theta, self.param_names_lcdm, self.prior_ranges_lcdm)
 
-        # H0 constraint
-        # Theory predicts slight anisotropy
-        H0_theory = 67.4  # Central value
-        H0_sigma = 0.5  # Uncertainty
-        if "H0_samples" in self.data:
-            chi2_H0 = np.sum((self.data["H0_samples"] - H0_theory) ** 2) / H0_sigma**2
-            log_like -= 0.5 * chi2_H0 / len(self.data["H0_samples"])
+        # Uniform priors
+        return _scalar_or_array(np.where(inside, 0.0, -np.inf), theta)
 
-        # S8 constraint
-        # Theory predicts 5.2% suppression
-        S8_theory = 0.79  # With suppression
-        S8_sigma = 0.02
-        if "S8_samples" in self.data:
-            chi2_S8 = np.sum((self.data["S8_samples"] - S8_theory) ** 2) / S8_sigma**2
-            log_like -= 0.5 * chi2_S8 / len(self.data["S8_samples"])
+    def log_likelihood_lcdm(self, theta: np.ndarray) -> Union[float, np.ndarray]:
+        """
+        Log likelihood for ΛCDM model; accepts (n, 2) arrays.
+        """
+        return self._log_likelihood("lcdm", theta)
 
-        # w(z) measurements
-        if "w_measurements" in self.data:
-            z, w_obs, w_err = self.data["w_measurements"]
-            # Simple sinusoidal model
-            t_lb = np.log(1 + z) / 0.7  # Approximate lookback time
-            w_theory = -1 + A_w * np.sin(2 * np.pi * t_lb / T)
-            chi2_w = np.sum((w_obs - w_theory) ** 2 / w_err**2)
-            log_like -= 0.5 * chi2_w
+    def log_posterior_lcdm(self, theta: np.ndarray) -> Union[float, np.ndarray]:
+        """
+        Log posterior for ΛCDM model; accepts (n, 2) arrays.
+        """
+        lp = self.log_prior_lcdm(theta)
+        if np.ndim(lp) == 0:
+            if not np.isfinite(lp):
+                return -np.inf
+            return lp + self.log_likelihood_lcdm(theta)
+        return np.where(np.isfinite(lp), lp + self.log_likelihood_lcdm(theta), -np.inf)
+
+    def _model(self, model: str):
+        """Parameter names, prior ranges and log prior of `model`."""
+        if model == "oscillating":
+            return self.param_names_osc, self.prior_ranges_osc, self.log_prior_osc
+        return self.param_names_lcdm, self.prior_ranges_lcdm, self.log_prior_lcdm
 
-        return log_like
+    def log_prior_gradient(self, model: str, theta: np.ndarray) -> np.ndarray:
+        """
+        Gradient of the log prior inside the prior box, shape (..., ndim).
 
-    def log_posterior_osc(self, theta: np.ndarray) -> float:
+        Uniform priors contribute nothing, log-uniform ones -1/θ.
         """
-        Log posterior for oscillating brane model.
+        names = self._model(model)[0]
+        theta = np.asarray(theta, dtype=float)
+        gradient = np.zeros(theta.shape)
+        for i, name in enumerate(names):
+            if name in self.log_uniform_params:
+                gradient[..., i] = -1 / theta[..., i]
+        return gradient
+
+    def log_likelihood_gradient(self, model: str, theta: np.ndarray) -> np.ndarray:
         """
-        lp = self.log_prior_osc(theta)
-        if not np.isfinite(lp):
-            return -np.inf
-        return lp + self.log_likelihood_osc(theta)
+        Gradient of the summed dataset log likelihoods, shape (..., ndim).
+
+        Analytic for datasets with `has_analytic_gradient` and a theory
+        Jacobian for `model`, finite differences otherwise (see
+        `DatasetLikelihood.analytic_gradient`).
+        """
+        theta = np.asarray(theta, dtype=float)
+        gradient = np.zeros(theta.shape)
+        for dataset in self.datasets:
+            gradient += dataset.log_likelihood_gradient(model, theta)
+        return gradient
 
-    def log_prior_lcdm(self, theta: np.ndarray) -> float:
+    def log_posterior_gradient(self, model: str, theta: np.ndarray) -> np.ndarray:
         """
-        Log prior for ΛCDM model.
+        Gradient of the log posterior inside the prior box, (..., ndim).
         """
-        H0, Omega_m = theta
+        return self.log_prior_gradient(model, theta) + self.log_likelihood_gradient(
+            model, theta
+        )
 
-        # Check bounds
-        if not (
-            self.prior_ranges_lcdm["H0"][0] <= H0 <= self.prior_ranges_lcdm["H0"][1]
-        ):
-            return -np.inf
-        if not (
-            self.prior_ranges_lcdm["Omega_m"][0]
-            <= Omega_m
-            <= self.prior_ranges_lcdm["Omega_m"][1]
-        ):
-            return -np.inf
+    def prior_transform(self, u: np.ndarray, model: str) -> np.ndarray:
+        """
+        Map points of the unit hypercube to parameter vectors of `model`.
 
-        return 0  # Uniform priors
+        The image of uniform u follows the normalized prior: log-uniform for
+        `log_uniform_params`, uniform otherwise.
 
-    def log_likelihood_lcdm(self, theta: np.ndarray) -> float:
+        Parameters
+        ----------
+        u : array
+            Shape (..., ndim), entries in [0, 1]
+        model : str
+            'oscillating' or 'lcdm'
+
+        Returns
+        -------
+        theta : array
+            Parameter vectors, shape (..., ndim)
         """
-        Log likelihood for ΛCDM model.
+        if model == "oscillating":
+            names, ranges = self.param_names_osc, self.prior_ranges_osc
+        else:
+            names, ranges = self.param_names_lcdm, self.prior_ranges_lcdm
+
+        u = np.asarray(u, dtype=float)
+        theta = np.empty_like(u)
+        for i, name in enumerate(names):
+            low, high = ranges[name]
+            if name in self.log_uniform_params:
+                theta[..., i] = low * (high / low) ** u[..., i]
+            else:
+                theta[..., i] = low + (high - low) * u[..., i]
+        return theta
+
+    def nested_evidence(
+        self, model: str, n_live: int = 400, **kwargs
+    ) -> Dict[str, np.ndarray]:
         """
-        H0, Omega_m = theta
+        Evidence and weighted posterior samples by nested sampling.
 
-        log_like = 0
+        Unlike `compute_evidence`, the evidence is taken with respect to the
+        normalized prior and its error is bounded.
 
-        # H0 constraint
-        H0_sigma = 0.5
-        if "H0_samples" in self.data:
-            chi2_H0 = np.sum((self.data["H0_samples"] - H0) ** 2) / H0_sigma**2
-            log_like -= 0.5 * chi2_H0 / len(self.data["H0_samples"])
+        Parameters
+        ----------
+        model : str
+            'oscillating' or 'lcdm'
+        n_live : int
+            Number of live points
+        **kwargs
+            Passed on to `evidence.nested_sampling`
 
-        # S8 constraint
-        S8_theory = 0.83  # ΛCDM prediction
-        S8_sigma = 0.02
-        if "S8_samples" in self.data:
-            chi2_S8 = np.sum((self.data["S8_samples"] - S8_theory) ** 2) / S8_sigma**2
-            log_like -= 0.5 * chi2_S8 / len(self.data["S8_samples"])
+        Returns
+        -------
+        result : dict
+            See `evidence.nested_sampling`
+        """
+        if model == "oscillating":
+            ndim, log_likelihood = len(self.param_names_osc), self.log_likelihood_osc
+        else:
+            ndim, log_likelihood = len(self.param_names_lcdm), self.log_likelihood_lcdm
+
+        start = time.perf_counter()
+        result = nested_sampling(
+            log_likelihood,
+            partial(self.prior_transform, model=model),
+            ndim,
+            n_live=n_live,
+            **kwargs,
+        )
+        print(
+            f"Nested sampling: {result['n_calls']} likelihood calls in "
+            f"{time.perf_counter() - start:.1f} s, "
+            f"log Z = {result['log_evidence']:.3f} ± "
+            f"{result['log_evidence_error']:.3f}"
+        )
+        return result
+
+    def thermodynamic_evidence(
+        self,
+        model: str,
+        betas: Optional[np.ndarray] = None,
+        n_walkers: int = 32,
+        nsteps: int = 2000,
+        parallel: bool = False,
+        processes: Optional[int] = None,
+        **kwargs,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Evidence by thermodynamic integration over a parallel-tempered ladder.
+
+        Parameters
+        ----------
+        model : str
+            'oscillating' or 'lcdm'
+        betas : array, optional
+            Inverse temperatures from 1 to 0 (default
+            `evidence.default_ladder()`); adapted during burn-in
+        n_walkers : int
+            Walkers per temperature
+        nsteps : int
+            Total steps, the first half being burn-in
+        parallel : bool
+            Evaluate the proposals of all temperatures in a process pool
+        processes : int, optional
+            Pool size; defaults to all cores
+        **kwargs
+            Passed on to `evidence.parallel_tempering`
+
+        Returns
+        -------
+        result : dict
+            See `evidence.parallel_tempering`
+        """
+        if model == "oscillating":
+            ndim = len(self.param_names_osc)
+            log_likelihood, log_prior = self.log_likelihood_osc, self.log_prior_osc
+        else:
+            ndim = len(self.param_names_lcdm)
+            log_likelihood, log_prior = self.log_likelihood_lcdm, self.log_prior_lcdm
+
+        prior_transform = partial(self.prior_transform, model=model)
+        kwargs.update(betas=betas, n_walkers=n_walkers, nsteps=nsteps)
+        start = time.perf_counter()
+        if parallel:
+            # Workers get the analyzer once; tasks only carry the method name
+            log_likelihood = partial(_call_worker, log_likelihood.__name__)
+            with Pool(processes, _init_worker, (self,)) as pool:
+                result = parallel_tempering(
+                    log_likelihood,
+                    log_prior,
+                    prior_transform,
+                    ndim,
+                    pool=pool,
+                    n_chunks=processes or os.cpu_count(),
+                    **kwargs,
+                )
+        else:
+            result = parallel_tempering(
+                log_likelihood, log_prior, prior_transform, ndim, **kwargs
+            )
+        print(
+            f"Parallel tempering: {len(result['betas'])} temperatures in "
+            f"{time.perf_counter() - start:.1f} s, "
+            f"log Z = {result['log_evidence']:.3f} ± "
+            f"{result['log_evidence_error']:.3f} "
+            f"(discretization {result['discretization_error']:.3f})"
+        )
+        return result
+
+    def find_map(
+        self,
+        model: str,
+        n_starts: int = 256,
+        h: float = 1e-4,
+        rng: Optional[np.random.Generator] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Posterior mode and Laplace approximation of `model`.
 
-        # w(z) = -1 for ΛCDM
-        if "w_measurements" in self.data:
-            z, w_obs, w_err = self.data["w_measurements"]
-            w_theory = -np.ones_like(z)
-            chi2_w = np.sum((w_obs - w_theory) ** 2 / w_err**2)
-            log_like -= 0.5 * chi2_w
+        Both are computed for the posterior density in the logit
+        coordinates x of `_logit_log_prob`, which map the prior box to all
+        of R^ndim and carry the log Jacobian of the transform. The search
+        starts from the best of n_starts prior draws.
 
-        return log_like
+        Parameters
+        ----------
+        model : str
+            'oscillating' or 'lcdm'
+        n_starts : int
+            Prior draws from which the optimizer starts at the best
+        h : float
+            Finite-difference step in x
+        rng : numpy.random.Generator, optional
+            Random number generator
 
-    def log_posterior_lcdm(self, theta: np.ndarray) -> float:
+        Returns
+        -------
+        result : dict
+            See `evidence.laplace_approximation`; the 'log_evidence' is
+            with respect to the normalized prior. Adds the mode 'theta' in
+            parameter space and the 'log_posterior' there
         """
-        Log posterior for ΛCDM model.
+        rng = np.random.default_rng() if rng is None else rng
+        ndim = len(self._model(model)[0])
+        theta0 = self.prior_transform(rng.random((n_starts, ndim)), model)
+
+        result = laplace_approximation(
+            partial(self._logit_log_prob, model), self._to_logit(model, theta0), h=h
+        )
+        # log_prior_* is unnormalized; the prior transform is not
+        result["log_evidence"] -= self._log_prior_volume(model)
+        result["theta"] = self._from_logit(model, result["x"])[0]
+        log_prior = self._model(model)[2]
+        result["log_posterior"] = log_prior(result["theta"]) + self._log_likelihood(
+            model, result["theta"]
+        )
+        return result
+
+    def laplace_evidence(self, model: str, **kwargs) -> float:
         """
-        lp = self.log_prior_lcdm(theta)
-        if not np.isfinite(lp):
-            return -np.inf
-        return lp + self.log_likelihood_lcdm(theta)
+        Laplace-approximation log evidence, a quick look at ln Z.
+
+        See `find_map` for the coordinates in which it is computed. Along
+        a direction the data do not constrain, the posterior in x is
+        logistic rather than Gaussian, which biases ln Z low by ~0.12.
+        """
+        return self.find_map(model, **kwargs)["log_evidence"]
+
+    def fisher_ball(self, model: str, nwalkers: int) -> np.ndarray:
+        """
+        Walker positions drawn from the Laplace approximation at the mode.
+
+        Drawn in the logit coordinates of `find_map`, so all walkers lie
+        inside the prior box and unconstrained parameters spread over
+        their prior range.
+
+        Returns
+        -------
+        p0 : array
+            Shape (nwalkers, ndim)
+        """
+        # Seeded from the global state, like the uniform starting boxes
+        rng = np.random.default_rng(np.random.randint(2**31))
+        fit = self.find_map(model, rng=rng)
+        chol = np.linalg.cholesky(fit["covariance"])
+        x = fit["x"] + rng.standard_normal((nwalkers, len(fit["x"]))) @ chol.T
+        return self._from_logit(model, x)[0]
 
     def run_mcmc(
-        self, model: str = "oscillating", nwalkers: int = 32, nsteps: int = 5000
+        self,
+        model: str = "oscillating",
+        nwalkers: int = 32,
+        nsteps: int = 5000,
+        vectorize: bool = False,
+        parallel: bool = False,
+        processes: Optional[int] = None,
+        backend: Optional[str] = None,
+        checkpoint_every: int = 100,
+        adaptive: bool = False,
+        tau_factor: float = 50,
+        tau_rtol: float = 0.01,
+        check_every: int = 100,
+        init: str = "map",
     ) -> emcee.EnsembleSampler:
         """
         Run MCMC sampling for specified model.
@@ -218,55 +597,325 @@ class BayesianAnalyzer:
         nwalkers : int
             Number of MCMC walkers
         nsteps : int
-            Number of MCMC steps
+            Number of MCMC steps; the maximum number if adaptive
+        vectorize : bool
+            Evaluate the log posterior for all walkers in one array call
+        parallel : bool
+            Evaluate walkers in a process pool; with vectorize=True each
+            worker receives one contiguous block of walkers
+        processes : int, optional
+            Pool size; defaults to all cores
+        backend : str, optional
+            Directory for a checkpointed on-disk chain (`NpyBackend`). If it
+            already holds a checkpoint of the same model, number of walkers
+            and data (`data_hash`), sampling resumes from it and runs until
+            the chain has nsteps steps in total; any other checkpoint is
+            overwritten by a fresh chain
+        checkpoint_every : int
+            Steps between checkpoints of the on-disk chain
+        adaptive : bool
+            Stop early once the chain is longer than tau_factor times the
+            integrated autocorrelation time τ of every parameter and τ has
+            changed by less than tau_rtol since the previous estimate
+        tau_factor : float
+            Required chain length in units of τ
+        tau_rtol : float
+            Relative change of τ below which it counts as stable
+        check_every : int
+            Steps between τ estimates
+        init : str
+            'map' to start the walkers in a Fisher ball around the posterior
+            mode (`fisher_ball`), falling back to 'box' if the Hessian there
+            is not positive definite; 'box' for fixed uniform boxes
 
         Returns
         -------
         sampler : emcee.EnsembleSampler
-            The sampler object with chains
+            The sampler object with chains. `sampler.burn_in` holds the
+            number of steps to discard: 2 max(τ) if adaptive, otherwise
+            DEFAULT_BURN_IN
         """
+        if init == "map":
+            try:
+                p0 = self.fisher_ball(model, nwalkers)
+            except ValueError as error:
+                print(f"No Fisher ball ({error}); starting from the box")
+                init = "box"
+        elif init != "box":
+            raise ValueError(f"Unknown init '{init}'")
+
         if model == "oscillating":
             ndim = len(self.param_names_osc)
             log_prob_fn = self.log_posterior_osc
 
             # Initial positions
-            p0 = []
-            for i in range(nwalkers):
-                tau_0 = np.random.uniform(3e19, 9e19)
-                f_osc = np.random.uniform(0.08, 0.12)
-                T = np.random.uniform(1.8, 2.2)
-                A_w = np.random.uniform(0.002, 0.004)
-                p0.append([tau_0, f_osc, T, A_w])
+            if init == "box":
+                p0 = []
+                for i in range(nwalkers):
+                    tau_0 = np.random.uniform(3e19, 9e19)
+                    f_osc = np.random.uniform(0.08, 0.12)
+                    T = np.random.uniform(1.8, 2.2)
+                    A_w = np.random.uniform(0.002, 0.004)
+                    p0.append([tau_0, f_osc, T, A_w])
 
         else:  # ΛCDM
             ndim = len(self.param_names_lcdm)
             log_prob_fn = self.log_posterior_lcdm
 
             # Initial positions
-            p0 = []
-            for i in range(nwalkers):
-                H0 = np.random.uniform(65, 70)
-                Omega_m = np.random.uniform(0.30, 0.32)
-                p0.append([H0, Omega_m])
+            if init == "box":
+                p0 = []
+                for i in range(nwalkers):
+                    H0 = np.random.uniform(65, 70)
+                    Omega_m = np.random.uniform(0.30, 0.32)
+                    p0.append([H0, Omega_m])
+
+        # On-disk chain, resumed from its last checkpoint if there is one
+        n_run = nsteps
+        if backend is not None:
+            tag = f"{model}:{self.data_hash}"
+            backend = NpyBackend(backend, block_size=checkpoint_every, tag=tag)
+            if backend.matches(nwalkers, ndim) and backend.iteration > 0:
+                print(f"Resuming from step {backend.iteration} of {nsteps}")
+                p0 = None
+                n_run = max(nsteps - backend.iteration, 0)
+            elif backend.initialized:
+                print(
+                    f"Checkpoint in {backend.path} is from another run; "
+                    "starting afresh"
+                )
+                backend.reset(nwalkers, ndim)
 
         # Run MCMC
-        sampler = emcee.EnsembleSampler(nwalkers, ndim, log_prob_fn)
-        sampler.run_mcmc(p0, nsteps, progress=True)
+        sample_args = (p0, n_run, adaptive, tau_factor, tau_rtol, check_every)
+        start = time.perf_counter()
+        if parallel:
+            # Workers get the analyzer once; tasks only carry the method name
+            log_prob_fn = partial(_call_worker, log_prob_fn.__name__)
+            with Pool(processes, _init_worker, (self,)) as pool:
+                if vectorize:
+                    n_chunks = min(nwalkers, processes or os.cpu_count())
+                    log_prob_fn = _ChunkedLogProb(log_prob_fn, pool, n_chunks)
+                sampler = emcee.EnsembleSampler(
+                    nwalkers,
+                    ndim,
+                    log_prob_fn,
+                    pool=pool,
+                    vectorize=vectorize,
+                    backend=backend,
+                )
+                n_done = self._sample(sampler, *sample_args)
+        else:
+            sampler = emcee.EnsembleSampler(
+                nwalkers, ndim, log_prob_fn, vectorize=vectorize, backend=backend
+            )
+            n_done = self._sample(sampler, *sample_args)
+        elapsed = time.perf_counter() - start
+
+        if n_done:
+            print(
+                f"Sampled {nwalkers * n_done} walker steps in {elapsed:.1f} s "
+                f"({nwalkers * n_done / elapsed:.0f} walkers/s)"
+            )
+
+        sampler.burn_in = DEFAULT_BURN_IN
+        if adaptive:
+            tau = sampler.get_autocorr_time(tol=0)
+            sampler.burn_in = int(np.ceil(2 * np.max(tau)))
+            print(
+                f"τ = {np.array2string(tau, precision=1)}, "
+                f"chain length {sampler.iteration} = "
+                f"{sampler.iteration / np.max(tau):.0f} max(τ), "
+                f"burn-in {sampler.burn_in}"
+            )
 
         return sampler
 
+    def _sample(
+        self,
+        sampler: emcee.EnsembleSampler,
+        p0,
+        n_run: int,
+        adaptive: bool,
+        tau_factor: float,
+        tau_rtol: float,
+        check_every: int,
+    ) -> int:
+        """
+        Advance the sampler by up to n_run steps; returns the steps taken.
+
+        In adaptive mode τ is estimated every check_every steps of the full
+        chain (including resumed steps) and sampling stops once it has
+        converged, see `run_mcmc`.
+        """
+        if not n_run:
+            return 0
+        if not adaptive:
+            sampler.run_mcmc(p0, n_run, progress=True)
+            return n_run
+
+        if p0 is None:
+            p0 = sampler.get_last_sample()
+        start_iteration = sampler.iteration
+        tau_old = np.inf
+        for _ in sampler.sample(p0, iterations=n_run, progress=True):
+            if sampler.iteration % check_every:
+                continue
+            # tol=0: always return the estimate, convergence is tested here
+            tau = sampler.get_autocorr_time(tol=0)
+            converged = np.all(tau_factor * tau < sampler.iteration)
+            converged &= np.all(np.abs(tau_old - tau) < tau_rtol * tau)
+            if converged:
+                print(f"Converged after {sampler.iteration} steps")
+                break
+            tau_old = tau
+        else:
+            print(f"Not converged after {sampler.iteration} steps")
+
+        # Stopping early leaves a partial block in the on-disk buffer
+        if isinstance(sampler.backend, NpyBackend):
+            sampler.backend.checkpoint()
+        return sampler.iteration - start_iteration
+
+    def _log_prior_volume(self, model: str) -> float:
+        """ln ∫ exp(log_prior) dθ over the prior box of `model`."""
+        names, ranges, _ = self._model(model)
+        log_volume = 0.0
+        for name in names:
+            low, high = ranges[name]
+            if name in self.log_uniform_params:
+                log_volume += np.log(np.log(high / low))
+            else:
+                log_volume += np.log(high - low)
+        return log_volume
+
+    def _to_logit(self, model: str, theta: np.ndarray) -> np.ndarray:
+        """Logit coordinates x = logit((θ - low)/(high - low)) of θ."""
+        names, ranges, _ = self._model(model)
+        low, high = np.array([ranges[name] for name in names]).T
+        u = np.clip((theta - low) / (high - low), 1e-9, 1 - 1e-9)
+        return np.log(u / (1 - u))
+
+    def _from_logit(
+        self, model: str, x: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """θ, σ(x) and log dθ/dx per coordinate, for logit coordinates x."""
+        names, ranges, _ = self._model(model)
+        low, high = np.array([ranges[name] for name in names]).T
+        sig = expit(x)
+        # log σ(x)(1 - σ(x)) = -|x| - 2 log(1 + e^-|x|), stable for large |x|
+        log_jacobian = np.log(high - low) - np.abs(x) - 2 * np.log1p(np.exp(-np.abs(x)))
+        return low + (high - low) * sig, sig, log_jacobian
+
+    def _logit_log_prob(self, model: str, x: np.ndarray) -> np.ndarray:
+        """
+        Log posterior in x = logit((θ - low)/(high - low)).
+
+        The prior box maps to all of R^ndim; the Jacobian
+        Π (high - low) σ(x)(1 - σ(x)) of the transform is included.
+        """
+        theta, _, log_jacobian = self._from_logit(model, x)
+        log_prior = self._model(model)[2]
+        log_prob = log_prior(theta) + self._log_likelihood(model, theta)
+        return log_prob + np.sum(log_jacobian, axis=-1)
+
+    def _logit_log_prob_grad(
+        self, model: str, x: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Log posterior and gradient in x, see `_logit_log_prob`.
+        """
+        theta, sig, log_jacobian = self._from_logit(model, x)
+        dtheta_dx = np.exp(log_jacobian)
+        gradient = self.log_posterior_gradient(model, theta) * dtheta_dx + 1 - 2 * sig
+        return self._logit_log_prob(model, x), gradient
+
+    def run_hmc(
+        self,
+        model: str = "oscillating",
+        n_chains: int = 8,
+        n_samples: int = 1000,
+        n_warmup: int = 500,
+        **kwargs,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Sample the posterior with Hamiltonian Monte Carlo.
+
+        Uses the likelihood and prior gradients (`log_posterior_gradient`)
+        in logit coordinates of the prior box; datasets without an analytic
+        gradient for `model` are reported, as they fall back to finite
+        differences. The chains start in a Fisher ball around the posterior
+        mode.
+
+        Parameters
+        ----------
+        model : str
+            'oscillating' or 'lcdm'
+        n_chains : int
+            Chains advanced together with vectorized gradient calls
+        n_samples : int
+            Samples per chain after warm-up
+        n_warmup : int
+            Warm-up iterations for step-size adaptation
+        **kwargs
+            Passed on to `hmc.hmc`
+
+        Returns
+        -------
+        result : dict
+            See `hmc.hmc`; 'samples' are parameter vectors θ of shape
+            (n_samples, n_chains, ndim)
+        """
+        numeric = [d.name for d in self.datasets if not d.analytic_gradient(model)]
+        if numeric:
+            print(f"Finite-difference gradients for: {', '.join(numeric)}")
+
+        x0 = self._to_logit(model, self.fisher_ball(model, n_chains))
+
+        start = time.perf_counter()
+        result = hmc(
+            partial(self._logit_log_prob_grad, model),
+            x0,
+            n_samples=n_samples,
+            n_warmup=n_warmup,
+            **kwargs,
+        )
+        elapsed = time.perf_counter() - start
+        print(
+            f"HMC: {result['n_gradient_evals']} gradient evaluations in "
+            f"{elapsed:.1f} s, step size {result['step_size']:.3f}, "
+            f"acceptance {result['accept_rate']:.2f}"
+        )
+
+        result["samples"] = self._from_logit(model, result["samples"])[0]
+        return result
+
     def compute_evidence(
-        self, sampler: emcee.EnsembleSampler, model: str
+        self,
+        sampler: Union[emcee.EnsembleSampler, str],
+        model: str,
+        discard: Optional[int] = None,
+        n_blocks: int = 100,
     ) -> Tuple[float, float]:
         """
-        Compute Bayesian evidence using thermodynamic integration.
+        Estimate Bayesian evidence from the log-probabilities of a chain.
+
+        This is a harmonic-style mean over the posterior samples, cheap but
+        with unbounded variance; see `nested_evidence` and
+        `thermodynamic_evidence` for converging estimators.
 
         Parameters
         ----------
-        sampler : emcee.EnsembleSampler
-            The sampler with chains
+        sampler : emcee.EnsembleSampler or str
+            The sampler with chains, or the directory of an on-disk chain
+            written by `NpyBackend` (read memory-mapped)
         model : str
             'oscillating' or 'lcdm'
+        discard : int, optional
+            Burn-in steps; defaults to `sampler.burn_in` (DEFAULT_BURN_IN if
+            unset), or half the chain for a directory
+        n_blocks : int
+            Number of blocks of consecutive steps for the jackknife error
 
         Returns
         -------
@@ -275,29 +924,18 @@ class BayesianAnalyzer:
         error : float
             Estimated error in log evidence
         """
-        # Get chains after burn-in
-        chains = sampler.get_chain(discard=1000, flat=True)
-        log_likes = sampler.get_log_prob(discard=1000, flat=True)
+        # Log-probabilities after burn-in, (n_steps, nwalkers), not flattened
+        if isinstance(sampler, str):
+            log_likes = read_chain(sampler, discard=discard)["log_prob"]
+        else:
+            if discard is None:
+                discard = getattr(sampler, "burn_in", DEFAULT_BURN_IN)
+            log_likes = sampler.get_log_prob(discard=discard)
 
         # Simple harmonic mean estimator
         # More sophisticated: nested sampling or thermodynamic integration
-        max_log_like = np.max(log_likes)
-        log_evidence = max_log_like + np.log(np.mean(np.exp(log_likes - max_log_like)))
-
-        # Error estimate from jackknife
-        n = len(log_likes)
-        jackknife_estimates = []
-        for i in range(min(100, n)):
-            mask = np.ones(n, dtype=bool)
-            mask[i :: n // 100] = False
-            jk_likes = log_likes[mask]
-            jk_max = np.max(jk_likes)
-            jk_est = jk_max + np.log(np.mean(np.exp(jk_likes - jk_max)))
-            jackknife_estimates.append(jk_est)
-
-        error = np.std(jackknife_estimates) * np.sqrt(len(jackknife_estimates))
-
-        return log_evidence, error
+        # Error estimate from a block jackknife over consecutive steps
+        return block_jackknife_log_mean_exp(log_likes, n_blocks)
 
     def bayes_factor(self, log_evidence_osc: float, log_evidence_lcdm: float) -> float:
         """
@@ -365,6 +1003,19 @@ def main():
     """
     Run Bayesian analysis comparing models.
     """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument(
+        "--checkpoint",
+        metavar="DIR",
+        help="Checkpoint the chains in DIR/<model> and resume them from there",
+    )
+    args = parser.parse_args()
+
+    def backend(model):
+        if args.checkpoint is None:
+            return None
+        return os.path.join(args.checkpoint, model)
+
     print("Bayesian Analysis: Oscillating Brane vs ΛCDM")
     print("=" * 50)
 
@@ -372,17 +1023,40 @@ def main():
     data = generate_mock_data()
     analyzer = BayesianAnalyzer(data)
 
+    # Quick look before sampling
+    log_K_laplace = analyzer.bayes_factor(
+        analyzer.laplace_evidence("oscillating"), analyzer.laplace_evidence("lcdm")
+    )
+    print(f"\nLaplace approximation: log K ≈ {log_K_laplace:.2f}")
+
     # Run MCMC for both models
     print("\nRunning MCMC for oscillating brane model...")
-    sampler_osc = analyzer.run_mcmc("oscillating", nwalkers=32, nsteps=2000)
+    sampler_osc = analyzer.run_mcmc(
+        "oscillating",
+        nwalkers=32,
+        nsteps=20000,
+        vectorize=True,
+        backend=backend("oscillating"),
+        adaptive=True,
+    )
 
     print("\nRunning MCMC for ΛCDM model...")
-    sampler_lcdm = analyzer.run_mcmc("lcdm", nwalkers=32, nsteps=2000)
+    sampler_lcdm = analyzer.run_mcmc(
+        "lcdm",
+        nwalkers=32,
+        nsteps=20000,
+        vectorize=True,
+        backend=backend("lcdm"),
+        adaptive=True,
+    )
 
     # Compute evidences
-    print("\nComputing Bayesian evidences...")
-    log_Z_osc, err_osc = analyzer.compute_evidence(sampler_osc, "oscillating")
-    log_Z_lcdm, err_lcdm = analyzer.compute_evidence(sampler_lcdm, "lcdm")
+    print("\nComputing Bayesian evidences by nested sampling...")
+    nested_osc = analyzer.nested_evidence("oscillating", n_live=400)
+    nested_lcdm = analyzer.nested_evidence("lcdm", n_live=400)
+    log_Z_osc, err_osc = nested_osc["log_evidence"], nested_osc["log_evidence_error"]
+    log_Z_lcdm = nested_lcdm["log_evidence"]
+    err_lcdm = nested_lcdm["log_evidence_error"]
 
     # Bayes factor
     log_K = analyzer.bayes_factor(log_Z_osc, log_Z_lcdm)
@@ -398,8 +1072,11 @@ def main():
     print("\nSaving posterior samples...")
     np.savez(
         "posterior_v4.npz",
-        chains_osc=sampler_osc.get_chain(discard=1000, flat=True),
-        chains_lcdm=sampler_lcdm.get_chain(discard=1000, flat=True),
+        chains_osc=sampler_osc.get_chain(discard=sampler_osc.burn_in, flat=True),
+        chains_lcdm=sampler_lcdm.get_chain(discard=sampler_lcdm.burn_in, flat=True),
+        log_Z_osc=log_Z_osc,
+        err_osc=err_osc,
+        tau_osc=np.max(sampler_osc.get_autocorr_time(tol=0)),
         log_K=log_K,
         err_K=err_K,
     )
@@ -7,11 +7,141 @@ Detailed documentation of priors used in the Bayesian evidence calculation
 and cross-check with alternative prior choices.
 """
 
+import os
+import sys
+import time
+from typing import Dict
+
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 from scipy import stats
 
+sys.path.insert(0, os.path.dirname(__file__))
+
+from evidence import nested_sampling
+from reweighting import reweight
+
+# Minimum effective sample size for a reweighted evidence to be used
+MIN_ESS = 200
+
+
+def log_prior_from_spec(priors: Dict[str, dict], theta: np.ndarray):
+    """
+    Normalized log prior of a prior specification, vectorized.
+
+    Parameters
+    ----------
+    priors : dict
+        Parameter name -> spec with 'type' ('uniform', 'log-uniform' or
+        'gaussian') and 'range' and/or 'mean', 'std'; parameters in the
+        column order of theta
+    theta : array
+        Parameter vector, or array of shape (n, ndim)
+
+    Returns
+    -------
+    log_p : float or array
+        Scalar for a single vector, shape (n,) otherwise
+    """
+    theta = np.asarray(theta, dtype=float)
+    log_p = np.zeros(theta.shape[:-1])
+    inside = np.ones(theta.shape[:-1], dtype=bool)
+
+    for i, prior_spec in enumerate(priors.values()):
+        value = theta[..., i]
+
+        # Check bounds
+        if "range" in prior_spec:
+            a, b = prior_spec["range"]
+            inside &= (a <= value) & (value <= b)
+
+        # Compute prior contribution
+        if prior_spec["type"] == "uniform":
+            # Uniform: p(x) = 1/(b-a)
+            a, b = prior_spec["range"]
+            log_p += -np.log(b - a)
+
+        elif prior_spec["type"] == "log-uniform":
+            # Log-uniform: p(x) = 1/(x * log(b/a))
+            a, b = prior_spec["range"]
+            safe = np.where(value > 0, value, 1.0)
+            log_p += -np.log(safe) - np.log(np.log(b / a))
+
+        elif prior_spec["type"] == "gaussian":
+            # Gaussian: properly normalized
+            mean = prior_spec["mean"]
+            std = prior_spec["std"]
+            log_p += -0.5 * ((value - mean) / std) ** 2 - np.log(
+                std * np.sqrt(2 * np.pi)
+            )
+
+    log_p = np.where(inside, log_p, -np.inf)
+    return float(log_p) if theta.ndim == 1 else log_p
+
+
+def support_box(priors: Dict[str, dict], n_sigma: float = 5) -> Dict[str, dict]:
+    """
+    Uniform or log-uniform box covering a prior specification.
+
+    Ranges are kept; Gaussians without a range are cut at n_sigma.
+    Log-uniform parameters stay log-uniform. Used as the sampling prior
+    from which other priors are reached by reweighting.
+    """
+    box = {}
+    for param, prior_spec in priors.items():
+        if "range" in prior_spec:
+            low, high = prior_spec["range"]
+        else:
+            mean, std = prior_spec["mean"], prior_spec["std"]
+            low, high = mean - n_sigma * std, mean + n_sigma * std
+        log = prior_spec["type"] == "log-uniform"
+        box[param] = {"type": "log-uniform" if log else "uniform", "range": (low, high)}
+    return box
+
+
+def prior_transform_from_spec(priors: Dict[str, dict], u: np.ndarray) -> np.ndarray:
+    """
+    Map unit-cube points (..., ndim) to draws from a prior specification.
+
+    Gaussians with a range are truncated to it, so the draws follow
+    `log_prior_from_spec` up to the constant `log_truncated_mass`.
+    """
+    u = np.asarray(u, dtype=float)
+    theta = np.empty_like(u)
+    for i, prior_spec in enumerate(priors.values()):
+        if prior_spec["type"] == "gaussian":
+            mean, std = prior_spec["mean"], prior_spec["std"]
+            low, high = prior_spec.get("range", (-np.inf, np.inf))
+            cdf_low, cdf_high = stats.norm.cdf(
+                [(low - mean) / std, (high - mean) / std]
+            )
+            p = cdf_low + (cdf_high - cdf_low) * u[..., i]
+            theta[..., i] = mean + std * stats.norm.ppf(p)
+            continue
+
+        a, b = prior_spec["range"]
+        if prior_spec["type"] == "log-uniform":
+            theta[..., i] = a * (b / a) ** u[..., i]
+        else:
+            theta[..., i] = a + (b - a) * u[..., i]
+    return theta
+
+
+def log_truncated_mass(priors: Dict[str, dict]) -> float:
+    """
+    Log of the prior mass inside the ranges, < 0 for truncated Gaussians.
+    """
+    log_mass = 0.0
+    for prior_spec in priors.values():
+        if prior_spec["type"] == "gaussian" and "range" in prior_spec:
+            mean, std = prior_spec["mean"], prior_spec["std"]
+            low, high = prior_spec["range"]
+            log_mass += np.log(
+                stats.norm.cdf((high - mean) / std) - stats.norm.cdf((low - mean) / std)
+            )
+    return log_mass
+
 
 class PriorTable:
     """
@@ -90,48 +220,21 @@ class PriorTable:
         Parameters
         ----------
         theta : array
-            Parameter values
+            Parameter values, or an array of shape (n, ndim) of them
         model : str
             'oscillating' or 'lcdm'
         prior_set : str
             'standard', 'conservative', or 'informative'
         """
-        if prior_set == "standard":
-            priors = self.standard_priors[model]
-        else:
-            priors = self.alternative_priors[f"{model}_{prior_set}"]
-
-        log_p = 0
-        param_names = list(priors.keys())
-
-        for i, (param, value) in enumerate(zip(param_names, theta)):
-            prior_spec = priors[param]
-
-            # Check bounds
-            if "range" in prior_spec:
-                if not (prior_spec["range"][0] <= value <= prior_spec["range"][1]):
-                    return -np.inf
+        return log_prior_from_spec(self.get_priors(model, prior_set), theta)
 
-            # Compute prior contribution
-            if prior_spec["type"] == "uniform":
-                # Uniform: p(x) = 1/(b-a)
-                a, b = prior_spec["range"]
-                log_p += -np.log(b - a)
-
-            elif prior_spec["type"] == "log-uniform":
-                # Log-uniform: p(x) = 1/(x * log(b/a))
-                a, b = prior_spec["range"]
-                log_p += -np.log(value) - np.log(np.log(b / a))
-
-            elif prior_spec["type"] == "gaussian":
-                # Gaussian: properly normalized
-                mean = prior_spec["mean"]
-                std = prior_spec["std"]
-                log_p += -0.5 * ((value - mean) / std) ** 2 - np.log(
-                    std * np.sqrt(2 * np.pi)
-                )
-
-        return log_p
+    def get_priors(self, model="oscillating", prior_set="standard"):
+        """
+        Prior specification of a model and prior set.
+        """
+        if prior_set == "standard":
+            return self.standard_priors[model]
+        return self.alternative_priors[f"{model}_{prior_set}"]
 
     def generate_prior_samples(self, model="oscillating", n_samples=10000):
         """
@@ -266,47 +369,138 @@ class PriorTable:
         return fig
 
 
+def _nested_with_prior(analyzer, model: str, priors: Dict[str, dict], n_live: int):
+    """Nested sampling of `model` under a prior specification."""
+    if model == "oscillating":
+        log_likelihood = analyzer.log_likelihood_osc
+    else:
+        log_likelihood = analyzer.log_likelihood_lcdm
+    return nested_sampling(
+        log_likelihood,
+        lambda u: prior_transform_from_spec(priors, u),
+        len(priors),
+        n_live=n_live,
+    )
+
+
+def _reweighted_evidence(run, sampled: Dict[str, dict], priors: Dict[str, dict]):
+    """
+    Evidence under `priors` from a weighted posterior under the prior `sampled`.
+
+    run holds the 'samples', optional 'weights', the 'log_evidence' and
+    optional 'log_evidence_error' under `sampled`, and for correlated
+    samples their autocorrelation time 'tau' (see `reweighting.reweight`).
+    The error adds the error of that evidence and the importance-sampling
+    error of the evidence ratio in quadrature; the effective sample size
+    accounts for tau.
+    """
+    samples = run["samples"]
+    rw = reweight(
+        log_prior_from_spec(sampled, samples) - log_truncated_mass(sampled),
+        log_prior_from_spec(priors, samples),
+        run.get("weights"),
+        run.get("tau", 1.0),
+    )
+    log_Z = run["log_evidence"] + rw["log_evidence_ratio"]
+    err = np.hypot(run.get("log_evidence_error", 0.0), rw["log_evidence_ratio_error"])
+    return log_Z, err, rw["ess"]
+
+
+def _box_contains(outer: Dict[str, dict], inner: Dict[str, dict]) -> bool:
+    """Whether every range of the box `inner` lies inside that of `outer`."""
+    return all(
+        outer[param]["range"][0] <= inner[param]["range"][0]
+        and inner[param]["range"][1] <= outer[param]["range"][1]
+        for param in inner
+    )
+
+
 def compute_evidence_sensitivity(
-    data, prior_sets=["standard", "conservative", "informative"]
+    data,
+    prior_sets=["standard", "conservative", "informative"],
+    n_live=1000,
+    min_ess=MIN_ESS,
+    chain=None,
+    chain_priors=None,
 ):
     """
     Test sensitivity of Bayes factor to prior choice.
+
+    The evidence of each prior set of the oscillating model follows by
+    importance reweighting of an existing weighted posterior `chain`,
+    vectorized over all samples. Sets the chain cannot reach (support
+    outside that of chain_priors, or an effective sample size below
+    min_ess after accounting for the autocorrelation of the chain) are
+    sampled again under their own prior.
+
+    Parameters
+    ----------
+    data : dict
+        Observational data, see `BayesianAnalyzer`
+    prior_sets : list of str
+        Prior sets of the oscillating model ('standard', 'conservative',
+        'informative'); ΛCDM always uses its standard priors
+    n_live : int
+        Live points of the nested-sampling runs
+    min_ess : float
+        Minimum effective sample size of a reweighted evidence
+    chain : dict, optional
+        Posterior of the oscillating model under chain_priors: 'samples'
+        (n, 4), optional 'weights' (equal by default), 'log_evidence',
+        optional 'log_evidence_error' and, for an MCMC chain, its
+        integrated autocorrelation time 'tau' (per walker, in steps); e.g.
+        the result of `BayesianAnalyzer.nested_evidence`
+    chain_priors : dict, optional
+        Prior specification the chain was sampled under (default: the box
+        of `BayesianAnalyzer`, i.e. `support_box` of the standard priors);
+        its normalized log density is the base of the importance weights
+
+    Returns
+    -------
+    results : dict
+        Per prior set: 'log_Z_osc', 'log_Z_lcdm', 'log_K', 'err_K', the
+        reweighted 'ess' and its 'source' ('chain' or 'resampled')
     """
     from bayesian_analysis import BayesianAnalyzer
 
-    results = {}
-
-    for prior_set in prior_sets:
-        print(f"\nComputing evidence with {prior_set} priors...")
-
-        # Modify analyzer to use different priors
-        analyzer = BayesianAnalyzer(data)
-        prior_table = PriorTable()
-
-        # Override prior functions
-        def log_prior_osc_custom(theta):
-            return prior_table.log_prior(theta, "oscillating", prior_set)
-
-        analyzer.log_prior_osc = log_prior_osc_custom
-
-        # Run MCMC
-        sampler_osc = analyzer.run_mcmc("oscillating", nwalkers=32, nsteps=2000)
-        sampler_lcdm = analyzer.run_mcmc("lcdm", nwalkers=32, nsteps=2000)
+    start = time.perf_counter()
+    analyzer = BayesianAnalyzer(data)
+    prior_table = PriorTable()
+    if chain_priors is None:
+        chain_priors = support_box(prior_table.get_priors("oscillating"))
 
-        # Compute evidences
-        log_Z_osc, err_osc = analyzer.compute_evidence(sampler_osc, "oscillating")
-        log_Z_lcdm, err_lcdm = analyzer.compute_evidence(sampler_lcdm, "lcdm")
+    # ΛCDM evidence under its standard priors
+    lcdm_priors = prior_table.get_priors("lcdm")
+    lcdm_run = _nested_with_prior(analyzer, "lcdm", lcdm_priors, n_live)
+    log_Z_lcdm, err_lcdm, _ = _reweighted_evidence(lcdm_run, lcdm_priors, lcdm_priors)
 
-        # Bayes factor
-        log_K = analyzer.bayes_factor(log_Z_osc, log_Z_lcdm)
+    results = {}
+    for prior_set in prior_sets:
+        priors = prior_table.get_priors("oscillating", prior_set)
+        reachable = chain is not None and _box_contains(
+            support_box(chain_priors), support_box(priors)
+        )
+        if reachable:
+            log_Z_osc, err_osc, ess = _reweighted_evidence(chain, chain_priors, priors)
+            source = "chain"
+            if ess < min_ess:
+                print(f"ESS {ess:.0f} too low for {prior_set} priors, resampling...")
+
+        if not reachable or ess < min_ess:
+            run = _nested_with_prior(analyzer, "oscillating", priors, n_live)
+            log_Z_osc, err_osc, ess = _reweighted_evidence(run, priors, priors)
+            source = "resampled"
 
         results[prior_set] = {
             "log_Z_osc": log_Z_osc,
             "log_Z_lcdm": log_Z_lcdm,
-            "log_K": log_K,
+            "log_K": analyzer.bayes_factor(log_Z_osc, log_Z_lcdm),
             "err_K": np.sqrt(err_osc**2 + err_lcdm**2),
+            "ess": ess,
+            "source": source,
         }
 
+    print(f"Sensitivity analysis took {time.perf_counter() - start:.1f} s")
     return results
 
 
@@ -341,17 +535,32 @@ def main():
 
         data = generate_mock_data()
 
+        # The main analysis chain is the base of the reweighting; files
+        # written before its evidence and τ were saved fall back to nested
+        # runs
+        chain = None
+        if "log_Z_osc" in data_file and "tau_osc" in data_file:
+            chain = {
+                "samples": data_file["chains_osc"],
+                "log_evidence": float(data_file["log_Z_osc"]),
+                "log_evidence_error": float(data_file["err_osc"]),
+                "tau": float(data_file["tau_osc"]),
+            }
+
         # Sensitivity analysis
         print("\nPrior sensitivity analysis:")
-        sensitivity = compute_evidence_sensitivity(data)
+        sensitivity = compute_evidence_sensitivity(data, chain=chain)
 
         print("\nResults with different prior choices:")
-        print(f"{'Prior Set':<15} {'log K':<10} {'Error':<10} {'Interpretation'}")
-        print("-" * 50)
+        print(
+            f"{'Prior Set':<15} {'log K':<10} {'Error':<10} {'ESS':<8} "
+            f"{'Interpretation'}"
+        )
+        print("-" * 58)
         for prior_set, results in sensitivity.items():
             print(
                 f"{prior_set:<15} {results['log_K']:<10.2f} "
-                f"{results['err_K']:<10.2f} ",
+                f"{results['err_K']:<10.2f} {results['ess']:<8.0f} ",
                 end="",
             )
             if results["log_K"] > 3:
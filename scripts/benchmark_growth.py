@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Growth Factor Benchmarks
+========================
+
+Times the exact growth-factor solve with the cached dark-energy density
+and with ρ_DE carried as an ODE state, against a calculator that rebuilds
+the ρ_DE(z) table on every E(z) call, as `GrowthFactorCalculator.E_z`
+used to. Both are also compared with a tight-tolerance reference: at the
+same cost, carrying ρ_DE as a state avoids the spline interpolation error.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from cosmo_background import CosmologicalBackground
+from growth_factor import GrowthFactorCalculator, h
+
+
+class UncachedGrowthFactorCalculator(GrowthFactorCalculator):
+    """
+    Reference calculator that re-integrates ρ_DE(z) on every call.
+    """
+
+    def _ln_rho_de(self, z: np.ndarray) -> np.ndarray:
+        table = CosmologicalBackground(
+            self.omega_m, self.omega_r, h, self.A_w, self.T_osc, n_grid=1000
+        )
+        return table.ln_rho_de(z)
+
+
+def time_call(fn, n_repeat: int = 3) -> float:
+    """
+    Best wall-clock time of `fn()` over n_repeat runs, in seconds.
+    """
+    best = np.inf
+    for _ in range(n_repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark_exact_growth(n_repeat: int = 3) -> dict:
+    """
+    Benchmark calculate_growth_factor(exact=True) for each ρ_DE treatment.
+
+    Returns
+    -------
+    timings : dict
+        Best times in seconds for 'uncached', 'cached' and 'augmented'
+    """
+    z = np.array([0.0, 0.5, 1.0, 1.5, 2.0])
+
+    uncached = UncachedGrowthFactorCalculator()
+    calc = GrowthFactorCalculator()
+
+    return {
+        "uncached": time_call(
+            lambda: uncached.calculate_growth_factor(z, exact=True, method="table"),
+            n_repeat,
+        ),
+        "cached": time_call(
+            lambda: calc.calculate_growth_factor(z, exact=True, method="table"),
+            n_repeat,
+        ),
+        "augmented": time_call(
+            lambda: calc.calculate_growth_factor(z, exact=True, method="augmented"),
+            n_repeat,
+        ),
+    }
+
+
+def accuracy_exact_growth() -> dict:
+    """
+    Maximum |ΔD₊| of calculate_growth_factor(exact=True) per ρ_DE treatment.
+
+    The reference is the ln a solution (`solve_growth`) at rtol = 1e-12.
+
+    Returns
+    -------
+    errors : dict
+        Maximum absolute errors for 'cached' and 'augmented'
+    """
+    z = np.array([0.0, 0.5, 1.0, 1.5, 2.0])
+    calc = GrowthFactorCalculator()
+    reference = calc.solve_growth(rtol=1e-12).D_plus(z)
+
+    errors = {}
+    for key, method in [("cached", "table"), ("augmented", "augmented")]:
+        D = calc.calculate_growth_factor(z, exact=True, method=method)
+        errors[key] = float(np.max(np.abs(D - reference)))
+    return errors
+
+
+def main():
+    """
+    Run all growth factor benchmarks.
+    """
+    print("Growth Factor Benchmarks")
+    print("========================")
+
+    timings = benchmark_exact_growth()
+    errors = accuracy_exact_growth()
+    print("calculate_growth_factor(exact=True):")
+    print(f"  ρ_DE rebuilt per call: {timings['uncached'] * 1e3:10.1f} ms")
+    for key, label in [
+        ("cached", "cached ρ_DE spline:   "),
+        ("augmented", "ρ_DE as ODE state:    "),
+    ]:
+        speedup = timings["uncached"] / timings[key]
+        print(
+            f"  {label} {timings[key] * 1e3:10.1f} ms  ({speedup:.1f}x), "
+            f"max |ΔD₊| = {errors[key]:.1e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
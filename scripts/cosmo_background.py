@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Cosmological Background
+=======================
+
+Time–redshift relations and tabulated background quantities for the flat
+cosmology shared by the brane dynamics, growth factor and PBH opacity
+calculations.
+"""
+
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+from scipy.interpolate import CubicSpline
+
+# Gauss–Legendre nodes and weights on [0, 1] for the radiation correction
+_GL_NODES, _GL_WEIGHTS = np.polynomial.legendre.leggauss(32)
+_GL_NODES = 0.5 * (_GL_NODES + 1)
+_GL_WEIGHTS = 0.5 * _GL_WEIGHTS
+
+
+def lookback_time(
+    z: np.ndarray,
+    omega_m: float,
+    omega_r: float = 0.0,
+    omega_de: Optional[float] = None,
+) -> np.ndarray:
+    """
+    Lookback time in units of 1/H₀ for a flat matter + radiation + Λ cosmology.
+
+    For matter + Λ the integral ∫dz/[(1+z)E(z)] has the closed form
+
+        t_lb = 2/(3√Ω_Λ) [asinh(√(Ω_Λ/Ω_m)) - asinh(√(Ω_Λ/Ω_m) (1+z)^(-3/2))]
+
+    which is used on its own when Ω_r = 0. With radiation the small
+    difference between the full and the matter + Λ integrands is added with
+    a fixed 32-point Gauss–Legendre rule in ln(1+z), so the cost stays O(1)
+    per redshift. Both paths agree with `quad` to better than 1e-8 relative
+    for z ≤ 1000.
+
+    Parameters
+    ----------
+    z : array-like
+        Redshift values
+    omega_m : float
+        Matter density parameter today
+    omega_r : float
+        Radiation density parameter today
+    omega_de : float, optional
+        Dark energy density parameter; defaults to 1 - Ω_m - Ω_r (flat)
+
+    Returns
+    -------
+    t_lb : array-like
+        Lookback time in units of 1/H₀
+    """
+    z = np.asarray(z, dtype=float)
+    if omega_de is None:
+        omega_de = 1 - omega_m - omega_r
+
+    # Closed-form matter + Λ part
+    r = np.sqrt(omega_de / omega_m)
+    t_lb = (2 / (3 * np.sqrt(omega_de))) * (
+        np.arcsinh(r) - np.arcsinh(r * (1 + z) ** -1.5)
+    )
+
+    if omega_r > 0:
+        # Radiation correction: ∫_0^x [1/E(x') - 1/E_mΛ(x')] dx', x = ln(1+z)
+        x = np.log1p(z)
+        xp = x[..., None] * _GL_NODES
+        a3 = np.exp(3 * xp)
+        E2_mL = omega_m * a3 + omega_de
+        E2 = E2_mL + omega_r * a3 * np.exp(xp)
+        delta = 1 / np.sqrt(E2) - 1 / np.sqrt(E2_mL)
+        t_lb = t_lb + x * (delta @ _GL_WEIGHTS)
+
+    return t_lb
+
+
+class CosmologicalBackground:
+    """
+    Tabulated background for a flat cosmology with oscillating dark energy.
+
+    E(z), lookback time, comoving distance and ρ_DE(z) are precomputed once
+    on a dense grid uniform in x = ln(1+z) and evaluated through cubic
+    splines. Dark energy follows w(z) = -1 + A_w sin(2π t_lb/T_osc), with
+    the phase taken from the ΛCDM lookback time as in
+    `GrowthFactorCalculator.w_de`; A_w = 0 gives a cosmological constant.
+    """
+
+    def __init__(
+        self,
+        omega_m: float,
+        omega_r: float = 0.0,
+        h: float = 0.674,
+        A_w: float = 0.0,
+        T_osc: float = 2.0,
+        z_max: float = 1500.0,
+        n_grid: int = 4096,
+    ):
+        """
+        Initialize and tabulate the background.
+
+        Parameters
+        ----------
+        omega_m : float
+            Matter density parameter today
+        omega_r : float
+            Radiation density parameter today
+        h : float
+            Dimensionless Hubble constant
+        A_w : float
+            Amplitude of w(z) oscillations
+        T_osc : float
+            Oscillation period in Gyr
+        z_max : float
+            Highest tabulated redshift
+        n_grid : int
+            Number of grid points in ln(1+z)
+        """
+        self.omega_m = omega_m
+        self.omega_r = omega_r
+        self.omega_de = 1 - omega_m - omega_r
+        self.h = h
+        self.A_w = A_w
+        self.T_osc = T_osc
+        self.z_max = z_max
+
+        # Hubble time in Gyr and Hubble distance in Mpc
+        self.t_H = 1 / (h * 100 / 3.086e19 * 3.156e16)
+        self.d_H = 2997.92458 / h
+
+        x = np.linspace(0, np.log1p(z_max), n_grid)
+        z = np.expm1(x)
+
+        # ln ρ_DE/ρ_DE,0 = ∫ 3(1 + w) dx
+        w = self.w(z)
+        self._ln_rho_de = CubicSpline(x, 3 * (1 + w)).antiderivative()
+
+        # dt/dx = 1/E and dχ/dx = (1+z)/E
+        inv_E = 1 / self.E(z)
+        self._lookback = CubicSpline(x, inv_E).antiderivative()
+        self._comoving = CubicSpline(x, (1 + z) * inv_E).antiderivative()
+
+    def _x(self, z: np.ndarray) -> np.ndarray:
+        """Grid coordinate ln(1+z), checking the tabulated range."""
+        z = np.asarray(z, dtype=float)
+        if np.any(z > self.z_max):
+            raise ValueError(f"Redshift above tabulated range z_max={self.z_max}")
+        return np.log1p(z)
+
+    def w(self, z: np.ndarray) -> np.ndarray:
+        """Dark energy equation of state w(z)."""
+        if self.A_w == 0:
+            return -np.ones_like(z, dtype=float)
+        t_lb = lookback_time(z, self.omega_m, self.omega_r, self.omega_de) * self.t_H
+        return -1 + self.A_w * np.sin(2 * np.pi * t_lb / self.T_osc)
+
+    def ln_rho_de(self, z: np.ndarray) -> np.ndarray:
+        """Natural log of ρ_DE(z)/ρ_DE,0."""
+        return self._ln_rho_de(self._x(z))
+
+    def rho_de(self, z: np.ndarray) -> np.ndarray:
+        """Dark energy density relative to today, ρ_DE(z)/ρ_DE,0."""
+        return np.exp(self.ln_rho_de(z))
+
+    def E(self, z: np.ndarray) -> np.ndarray:
+        """Dimensionless Hubble parameter E(z) = H(z)/H₀."""
+        z = np.asarray(z, dtype=float)
+        return np.sqrt(
+            self.omega_m * (1 + z) ** 3
+            + self.omega_r * (1 + z) ** 4
+            + self.omega_de * self.rho_de(z)
+        )
+
+    def lookback_time(self, z: np.ndarray) -> np.ndarray:
+        """Lookback time in Gyr."""
+        return self._lookback(self._x(z)) * self.t_H
+
+    def comoving_distance(self, z: np.ndarray) -> np.ndarray:
+        """Line-of-sight comoving distance in Mpc."""
+        return self._comoving(self._x(z)) * self.d_H
+
+
+_background_cache = lru_cache(maxsize=32)(CosmologicalBackground)
+
+
+def get_background(
+    omega_m: float,
+    omega_r: float = 0.0,
+    h: float = 0.674,
+    A_w: float = 0.0,
+    T_osc: float = 2.0,
+) -> CosmologicalBackground:
+    """
+    Shared background for a parameter set, cached in an LRU cache.
+
+    Repeated calls with the same (Ω_m, Ω_r, h, A_w, T_osc) return the same
+    tabulated object; see `set_background_cache_size` for the bound.
+    """
+    return _background_cache(
+        float(omega_m), float(omega_r), float(h), float(A_w), float(T_osc)
+    )
+
+
+def set_background_cache_size(maxsize: Optional[int]):
+    """
+    Set the maximum number of cached backgrounds (None for unbounded).
+
+    Existing cache entries are discarded.
+    """
+    global _background_cache
+    _background_cache = lru_cache(maxsize=maxsize)(CosmologicalBackground)
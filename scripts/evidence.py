@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+"""
+Evidence Engines
+================
+
+Bayesian evidence ln Z = ln ∫ L(θ) π(θ) dθ by nested sampling or by
+thermodynamic integration over a parallel-tempered ladder. The prior is
+given as a transform of the unit hypercube (nested sampling) or as an
+unnormalized log density (tempering, where the normalization cancels), so
+both return the evidence with respect to the normalized prior.
+
+Nested sampling draws new live points from a bounding ellipsoid of the
+current live points, in batches that are evaluated with one vectorized
+likelihood call; the same run yields ln Z, its error and weighted
+posterior samples.
+"""
+
+import os
+from typing import Callable, Dict, Optional, Sequence
+
+import numpy as np
+from scipy.integrate import simpson
+from scipy.special import logsumexp
+
+
+def _bounding_ellipsoid(points: np.ndarray, enlarge: float):
+    """
+    Centre and Cholesky factor of an ellipsoid covering all points.
+
+    The ellipsoid has the shape of the sample covariance, is scaled to
+    contain every point and then enlarged in volume by `enlarge`.
+    """
+    ndim = points.shape[1]
+    centre = points.mean(axis=0)
+    cov = np.atleast_2d(np.cov(points, rowvar=False))
+    chol = np.linalg.cholesky(cov + 1e-12 * np.eye(ndim))
+    y = np.linalg.solve(chol, (points - centre).T)
+    scale = np.max(np.sum(y**2, axis=0)) * enlarge ** (2 / ndim)
+    return centre, chol * np.sqrt(scale)
+
+
+def _sample_ellipsoid(
+    centre: np.ndarray, chol: np.ndarray, n: int, rng: np.random.Generator
+) -> np.ndarray:
+    """n points drawn uniformly in the ellipsoid, shape (n, ndim)."""
+    ndim = len(centre)
+    x = rng.standard_normal((n, ndim))
+    x *= (rng.random(n) ** (1 / ndim) / np.linalg.norm(x, axis=1))[:, None]
+    return centre + x @ chol.T
+
+
+def nested_sampling(
+    log_likelihood: Callable[[np.ndarray], np.ndarray],
+    prior_transform: Callable[[np.ndarray], np.ndarray],
+    ndim: int,
+    n_live: int = 400,
+    dlogz: float = 0.01,
+    batch_size: Optional[int] = None,
+    enlarge: float = 1.25,
+    update_interval: Optional[int] = None,
+    max_iter: int = 100_000,
+    rng: Optional[np.random.Generator] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Run nested sampling.
+
+    Parameters
+    ----------
+    log_likelihood : callable
+        Vectorized log likelihood, parameter vectors (n, ndim) -> (n,)
+    prior_transform : callable
+        Maps unit-cube points (n, ndim) to parameter vectors (n, ndim)
+        distributed as the (normalized) prior
+    ndim : int
+        Number of parameters
+    n_live : int
+        Number of live points; the ln Z error scales as 1/sqrt(n_live)
+    dlogz : float
+        Stop when the live points can add at most dlogz to ln Z
+    batch_size : int, optional
+        Candidates drawn and evaluated per likelihood call
+        (default n_live // 4)
+    enlarge : float
+        Volume enlargement of the bounding ellipsoid
+    update_interval : int, optional
+        Iterations between ellipsoid updates (default n_live // 10)
+    max_iter : int
+        Maximum number of iterations
+    rng : numpy.random.Generator, optional
+        Random number generator
+
+    Returns
+    -------
+    result : dict
+        'log_evidence', 'log_evidence_error' (sqrt(H/n_live)),
+        'information' H in nats, 'samples' (n, ndim) of dead and final live
+        points with normalized posterior 'weights' and their
+        'log_likelihood', and 'n_calls' likelihood evaluations
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    batch_size = batch_size or max(n_live // 4, 1)
+    update_interval = update_interval or max(n_live // 10, 1)
+
+    # Live points in the unit cube
+    live_u = rng.random((n_live, ndim))
+    live_logl = np.asarray(log_likelihood(prior_transform(live_u)), dtype=float)
+    n_calls = n_live
+
+    dead_u, dead_logl, dead_logvol = [], [], []
+    log_z = -np.inf
+    candidates_u = np.empty((0, ndim))
+    candidates_logl = np.empty(0)
+
+    for it in range(max_iter):
+        # Remaining evidence bound from the live points
+        log_vol = -it / n_live
+        log_z_remain = np.max(live_logl) + log_vol
+        if np.logaddexp(log_z, log_z_remain) - log_z < dlogz:
+            break
+
+        worst = np.argmin(live_logl)
+        logl_min = live_logl[worst]
+        log_dvol = log_vol + np.log(-np.expm1(-1 / n_live))
+        log_z = np.logaddexp(log_z, logl_min + log_dvol)
+        dead_u.append(live_u[worst].copy())
+        dead_logl.append(logl_min)
+        dead_logvol.append(log_dvol)
+
+        # Candidates from an earlier batch stay uniform within the
+        # ellipsoid when the threshold rises; drop them when it changes
+        if it % update_interval == 0:
+            centre, chol = _bounding_ellipsoid(live_u, enlarge)
+            candidates_u = candidates_u[:0]
+            candidates_logl = candidates_logl[:0]
+
+        keep = candidates_logl > logl_min
+        candidates_u, candidates_logl = candidates_u[keep], candidates_logl[keep]
+        while not len(candidates_logl):
+            u = _sample_ellipsoid(centre, chol, batch_size, rng)
+            u = u[np.all((u > 0) & (u < 1), axis=1)]
+            if not len(u):
+                continue
+            logl = np.asarray(log_likelihood(prior_transform(u)), dtype=float)
+            n_calls += len(u)
+            keep = logl > logl_min
+            candidates_u, candidates_logl = u[keep], logl[keep]
+
+        live_u[worst] = candidates_u[0]
+        live_logl[worst] = candidates_logl[0]
+        candidates_u, candidates_logl = candidates_u[1:], candidates_logl[1:]
+    else:
+        it = max_iter
+
+    # Final live points share the remaining prior volume
+    log_vol = -it / n_live
+    samples_u = np.concatenate([np.reshape(dead_u, (-1, ndim)), live_u])
+    logl = np.concatenate([dead_logl, live_logl])
+    log_wt = np.concatenate(
+        [np.asarray(dead_logvol) + dead_logl, live_logl + log_vol - np.log(n_live)]
+    )
+
+    log_z = logsumexp(log_wt)
+    weights = np.exp(log_wt - log_z)
+    information = np.sum(weights * logl) - log_z
+
+    return {
+        "log_evidence": float(log_z),
+        "log_evidence_error": float(np.sqrt(max(information, 0) / n_live)),
+        "information": float(information),
+        "samples": prior_transform(samples_u),
+        "weights": weights,
+        "log_likelihood": logl,
+        "n_calls": n_calls,
+    }
+
+
+def _map_chunks(fn: Callable, x: np.ndarray, pool, n_chunks: int) -> np.ndarray:
+    """
+    Vectorized fn over rows of x, split into chunks across a pool.
+
+    fn is pickled with every chunk, so it should be cheap to pickle, e.g. a
+    module-level function reading state installed by a Pool initializer.
+    """
+    if pool is None:
+        return np.asarray(fn(x), dtype=float)
+    return np.concatenate(pool.map(fn, np.array_split(x, n_chunks)))
+
+
+def _tempered(betas: np.ndarray, log_prior: np.ndarray, log_like: np.ndarray):
+    """log π + β log L for (n_temps, n) arrays, with 0·log L = 0 at β = 0."""
+    beta = betas[:, None]
+    tempered = np.where(beta > 0, beta * log_like, 0.0)
+    return np.where(np.isfinite(log_prior), log_prior + tempered, -np.inf)
+
+
+def default_ladder(n_temps: int = 16, beta_min: float = 1e-4) -> np.ndarray:
+    """
+    Inverse temperatures 1, ..., beta_min geometrically spaced, plus β = 0.
+    """
+    return np.append(np.geomspace(1, beta_min, n_temps - 1), 0.0)
+
+
+def _thermodynamic_integral(betas: np.ndarray, mean_log_l: np.ndarray):
+    """
+    ∫₀¹ ⟨ln L⟩_β dβ over a descending ladder ending at β = 0.
+
+    Down to the hottest nonzero rung, β ⟨ln L⟩_β is integrated in ln β
+    with Simpson's rule, which follows the steep fall of ⟨ln L⟩ at small
+    β much better than the trapezoid rule in β; the last interval to
+    β = 0 is a trapezoid. mean_log_l may carry leading batch axes.
+    """
+    body = simpson(betas[:-1] * mean_log_l[..., :-1], x=np.log(betas[:-1]), axis=-1)
+    tail = betas[-2] * (mean_log_l[..., -2] + mean_log_l[..., -1]) / 2
+    return tail - body
+
+
+def parallel_tempering(
+    log_likelihood: Callable[[np.ndarray], np.ndarray],
+    log_prior: Callable[[np.ndarray], np.ndarray],
+    prior_transform: Callable[[np.ndarray], np.ndarray],
+    ndim: int,
+    betas: Optional[Sequence[float]] = None,
+    n_walkers: int = 32,
+    nsteps: int = 2000,
+    burn_in: Optional[int] = None,
+    adapt: bool = True,
+    adaptation_lag: Optional[int] = None,
+    adaptation_time: Optional[float] = None,
+    pool=None,
+    n_chunks: Optional[int] = None,
+    n_blocks: int = 20,
+    n_bootstrap: int = 200,
+    rng: Optional[np.random.Generator] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Thermodynamic-integration evidence from a parallel-tempered ensemble.
+
+    Every rung of the ladder runs an ensemble of walkers with stretch
+    moves on π(θ) L(θ)^β; neighbouring rungs exchange walkers after every
+    step. During burn-in the ladder adapts so that all swap acceptance
+    rates become equal (Vousden, Farr & Mandel 2016), after which it is
+    frozen and
+
+        ln Z = ∫₀¹ ⟨ln L⟩_β dβ
+
+    is integrated with Simpson's rule in ln β (`_thermodynamic_integral`).
+    The statistical error is the standard deviation of ln Z over a block
+    bootstrap of the post-burn-in steps, which accounts for the
+    autocorrelation of the chains as long as the blocks are longer than
+    it. The discretization error of the ladder is estimated as the
+    difference to the integral over every other rung; the reported error
+    adds both in quadrature.
+
+    Parameters
+    ----------
+    log_likelihood : callable
+        Vectorized log likelihood, parameter vectors (n, ndim) -> (n,)
+    log_prior : callable
+        Vectorized log prior (normalization irrelevant), -inf outside
+    prior_transform : callable
+        Maps unit-cube points (n, ndim) to prior draws, used to start the
+        walkers
+    ndim : int
+        Number of parameters
+    betas : sequence of float, optional
+        Inverse temperatures, descending from 1 to 0 (default
+        `default_ladder()`)
+    n_walkers : int
+        Walkers per temperature (even)
+    nsteps : int
+        Total steps
+    burn_in : int, optional
+        Steps discarded and used for ladder adaptation (default nsteps // 2)
+    adapt : bool
+        Adapt the interior inverse temperatures during burn-in
+    adaptation_lag : int, optional
+        Steps over which the adaptation rate decays (t₀); default
+        burn_in // 10
+    adaptation_time : float, optional
+        Inverse initial adaptation rate (ν); default adaptation_lag / 100,
+        so a burn-in of 10⁵ steps gets the t₀ = 10⁴, ν = 100 of Vousden et
+        al. and shorter ones adapt proportionally faster
+    pool : multiprocessing.Pool, optional
+        Evaluate the likelihood of all rungs' proposals in parallel; see
+        `_map_chunks` for what log_likelihood should look like then
+    n_chunks : int, optional
+        Chunks per likelihood batch with a pool (default: one per process)
+    n_blocks : int
+        Blocks of consecutive post-burn-in steps for the bootstrap error
+    n_bootstrap : int
+        Bootstrap resamples of the blocks
+    rng : numpy.random.Generator, optional
+        Random number generator
+
+    Returns
+    -------
+    result : dict
+        'log_evidence', 'log_evidence_error' (bootstrap and ladder
+        discretization combined), the 'bootstrap_error' and
+        'discretization_error' parts, the final 'betas', the
+        post-burn-in 'mean_log_likelihood' per rung, 'swap_acceptance'
+        between neighbouring rungs, the β = 1 'chain' (steps, walkers,
+        ndim) and its 'log_likelihood' (steps, walkers)
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    betas = default_ladder() if betas is None else np.array(betas, dtype=float)
+    if betas[0] != 1 or betas[-1] != 0 or np.any(np.diff(betas) >= 0):
+        raise ValueError("betas must descend from 1 to 0")
+    if n_walkers % 2:
+        raise ValueError("n_walkers must be even")
+    burn_in = nsteps // 2 if burn_in is None else burn_in
+    if adaptation_lag is None:
+        adaptation_lag = max(burn_in // 10, 1)
+    if adaptation_time is None:
+        adaptation_time = max(adaptation_lag / 100, 1.0)
+    n_chunks = n_chunks or os.cpu_count()
+    n_temps, half = len(betas), n_walkers // 2
+
+    def evaluate(theta):
+        flat = theta.reshape(-1, ndim)
+        lp = np.asarray(log_prior(flat), dtype=float)
+        ll = _map_chunks(log_likelihood, flat, pool, n_chunks)
+        return lp.reshape(theta.shape[:-1]), ll.reshape(theta.shape[:-1])
+
+    # Walkers start from the prior at every temperature
+    pos = prior_transform(rng.random((n_temps, n_walkers, ndim)))
+    log_p, log_l = evaluate(pos)
+
+    rung_log_l = np.empty((nsteps - burn_in, n_temps))
+    n_swaps = np.zeros(n_temps - 1)
+    chain = np.empty((nsteps - burn_in, n_walkers, ndim))
+    chain_log_l = np.empty((nsteps - burn_in, n_walkers))
+
+    for step in range(nsteps):
+        # Stretch move (Goodman & Weare) for each half against the other
+        for first in (0, half):
+            active = slice(first, first + half)
+            other = slice(half - first, 2 * half - first)
+            partner = pos[:, other][
+                np.arange(n_temps)[:, None], rng.integers(0, half, (n_temps, half))
+            ]
+            z = (rng.random((n_temps, half)) + 1) ** 2 / 2  # a = 2
+            proposal = partner + z[..., None] * (pos[:, active] - partner)
+            new_p, new_l = evaluate(proposal)
+
+            log_ratio = (
+                (ndim - 1) * np.log(z)
+                + _tempered(betas, new_p, new_l)
+                - _tempered(betas, log_p[:, active], log_l[:, active])
+            )
+            accept = np.log(rng.random((n_temps, half))) < log_ratio
+            pos[:, active][accept] = proposal[accept]
+            log_p[:, active][accept] = new_p[accept]
+            log_l[:, active][accept] = new_l[accept]
+
+        # Swaps between neighbouring rungs, from hot to cold
+        accepted = np.empty(n_temps - 1)
+        for i in range(n_temps - 1, 0, -1):
+            perm = rng.permutation(n_walkers)
+            log_ratio = (betas[i - 1] - betas[i]) * (log_l[i, perm] - log_l[i - 1])
+            swap = np.log(rng.random(n_walkers)) < log_ratio
+            accepted[i - 1] = swap.mean()
+            j = perm[swap]
+            for a in (pos, log_p, log_l):
+                a[i - 1, swap], a[i, j] = a[i, j], a[i - 1, swap].copy()
+
+        if step < burn_in:
+            if adapt and n_temps > 2:
+                # Equalize swap rates; gaps are adapted in temperature
+                kappa = adaptation_lag / (step + adaptation_lag) / adaptation_time
+                gaps = np.diff(1 / betas[:-1]) * np.exp(
+                    kappa * (accepted[:-1] - accepted[1:])
+                )
+                betas[1:-1] = 1 / (1 + np.cumsum(gaps))
+        else:
+            rung_log_l[step - burn_in] = log_l.mean(axis=1)
+            n_swaps += accepted
+            chain[step - burn_in] = pos[0]
+            chain_log_l[step - burn_in] = log_l[0]
+
+    n_kept = max(nsteps - burn_in, 1)
+    mean_log_l = rung_log_l.mean(axis=0)
+
+    # ∫₀¹ dβ over the descending ladder, and over every other rung
+    log_z = _thermodynamic_integral(betas, mean_log_l)
+    betas2, mean2 = betas[::2], mean_log_l[::2]
+    if betas2[-1] != 0:
+        betas2, mean2 = np.append(betas2, 0.0), np.append(mean2, mean_log_l[-1])
+    discretization_error = abs(log_z - _thermodynamic_integral(betas2, mean2))
+
+    # Block bootstrap over steps; all rungs of a step stay together
+    n_blocks = min(n_blocks, len(rung_log_l))
+    log_z_error = np.nan
+    if n_blocks > 1:
+        block = len(rung_log_l) // n_blocks
+        block_means = (
+            rung_log_l[: n_blocks * block]
+            .reshape(n_blocks, block, n_temps)
+            .mean(axis=1)
+        )
+        resample = rng.integers(0, n_blocks, (n_bootstrap, n_blocks))
+        log_z_boot = _thermodynamic_integral(betas, block_means[resample].mean(axis=1))
+        log_z_error = np.std(log_z_boot, ddof=1)
+
+    return {
+        "log_evidence": float(log_z),
+        "log_evidence_error": float(np.hypot(log_z_error, discretization_error)),
+        "bootstrap_error": float(log_z_error),
+        "discretization_error": float(discretization_error),
+        "betas": betas,
+        "mean_log_likelihood": mean_log_l,
+        "swap_acceptance": n_swaps / n_kept,
+        "chain": chain,
+        "log_likelihood": chain_log_l,
+    }
+
+
+def _stencil_hessian(
+    f: Callable[[np.ndarray], np.ndarray], u: np.ndarray, h: float
+) -> np.ndarray:
+    """
+    Central-difference Hessian of a vectorized f at u, from one batch call.
+    """
+    ndim = len(u)
+    eye = h * np.eye(ndim)
+    i, j = np.triu_indices(ndim, 1)
+    points = np.concatenate(
+        [
+            u[None],
+            u + eye,
+            u - eye,
+            u + eye[i] + eye[j],
+            u + eye[i] - eye[j],
+            u - eye[i] + eye[j],
+            u - eye[i] - eye[j],
+        ]
+    )
+    values = np.asarray(f(points), dtype=float)
+    f0, plus, minus = values[0], values[1 : ndim + 1], values[ndim + 1 : 2 * ndim + 1]
+    pp, pm, mp, mm = np.split(values[2 * ndim + 1 :], 4)
+
+    hessian = np.diag((plus - 2 * f0 + minus) / h**2)
+    hessian[i, j] = hessian[j, i] = (pp - pm - mp + mm) / (4 * h**2)
+    return hessian
+
+
+def laplace_approximation(
+    log_prob: Callable[[np.ndarray], np.ndarray],
+    starts: np.ndarray,
+    h: float = 1e-4,
+) -> Dict[str, np.ndarray]:
+    """
+    Mode, Hessian and Laplace evidence of a density on unconstrained
+    coordinates.
+
+    log_prob is the log posterior density in coordinates x that cover all of
+    R^ndim (e.g. a logit transform of the prior box), including the log
+    Jacobian of the transform, so that its integral over x is the evidence.
+    The mode is found with L-BFGS-B from the best of the starting points,
+    using central-difference gradients, and with H = -∇² ln p at the mode
+
+        ln Z ≈ ln p_max + ½ ln det(2π H⁻¹).
+
+    As x is unbounded, the finite-difference stencils never leave the
+    support of the density.
+
+    Parameters
+    ----------
+    log_prob : callable
+        Vectorized log density, points (n, ndim) -> (n,)
+    starts : array
+        Candidate starting points, shape (n_starts, ndim)
+    h : float
+        Finite-difference step in x
+
+    Returns
+    -------
+    result : dict
+        The mode 'x' and its 'log_prob', the 'hessian' of -ln p, the
+        Gaussian 'covariance' and 'log_evidence'
+    """
+    from scipy.optimize import minimize
+
+    starts = np.asarray(starts, dtype=float)
+    ndim = starts.shape[1]
+    eye = h * np.eye(ndim)
+
+    def f(x):
+        return np.asarray(log_prob(x), dtype=float)
+
+    def objective(x):
+        values = f(np.concatenate([x[None], x + eye, x - eye]))
+        if not np.all(np.isfinite(values)):
+            return np.inf, np.zeros(ndim)
+        gradient = (values[1 : ndim + 1] - values[ndim + 1 :]) / (2 * h)
+        return -values[0], -gradient
+
+    x0 = starts[np.argmax(f(starts))]
+    x_map = minimize(objective, x0, jac=True, method="L-BFGS-B").x
+
+    hessian = -_stencil_hessian(f, x_map, h)
+    eigval, eigvec = np.linalg.eigh(hessian)
+    if np.any(eigval <= 0):
+        raise ValueError("Hessian at the mode is not positive definite")
+    log_max = float(f(x_map[None])[0])
+
+    return {
+        "x": x_map,
+        "log_prob": log_max,
+        "hessian": hessian,
+        "covariance": (eigvec / eigval) @ eigvec.T,
+        "log_evidence": log_max + 0.5 * np.sum(np.log(2 * np.pi / eigval)),
+    }
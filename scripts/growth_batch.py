@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Batched Growth Factor Engine
+============================
+
+Solves the linear growth equation for many (Ω_m, A_w, T_osc) cosmologies
+at once. All cosmologies share one fixed-step RK4 grid in ln a, so every
+step is a handful of array operations over the whole batch; large batches
+are split into chunks that can be spread over a process pool.
+"""
+
+import os
+import sys
+from multiprocessing import Pool
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from cosmo_background import lookback_time
+from growth_factor import Omega_r0, h
+
+# Hubble time in Gyr
+t_H = 1 / (h * 100 / 3.086e19 * 3.156e16)
+
+
+def _cumulative_simpson(f: np.ndarray, step: float) -> np.ndarray:
+    """
+    Cumulative integral from the first grid point along axis 0.
+
+    The grid is uniform with an odd number of points; even points use
+    composite Simpson panels and odd (mid-panel) points the matching
+    three-point rule, so the error is O(step⁴) everywhere.
+    """
+    F = np.zeros_like(f)
+    f0, f1, f2 = f[0:-2:2], f[1:-1:2], f[2::2]
+    F[2::2] = np.cumsum(step / 3 * (f0 + 4 * f1 + f2), axis=0)
+    F[1::2] = F[0:-2:2] + step / 12 * (5 * f0 + 8 * f1 - f2)
+    return F
+
+
+def _growth_coefficients(
+    u: np.ndarray, omega_m: np.ndarray, A_w: np.ndarray, T_osc: np.ndarray
+):
+    """
+    Coefficients P, Q of D'' = P D' + Q D on a uniform grid of u = ln(1+z).
+
+    The lookback time (for the w(z) phase) and ln ρ_DE are integrated
+    cumulatively along the grid from u = 0, shared by all RK4 stages.
+    Arrays have shape (n_grid, n_cosmologies).
+    """
+    step = u[1] - u[0]
+    omega_de = 1 - omega_m - Omega_r0
+    rho_m = omega_m * np.exp(3 * u)[:, None]
+    rho_r = Omega_r0 * np.exp(4 * u)[:, None]
+
+    # ΛCDM lookback time: closed form plus the radiation difference
+    t_lb = lookback_time(np.expm1(u)[:, None], omega_m, 0.0, omega_de)
+    radiation = 1 / np.sqrt(rho_m + rho_r + omega_de) - 1 / np.sqrt(rho_m + omega_de)
+    t_lb += _cumulative_simpson(radiation, step)
+
+    w = -1 + A_w * np.sin((2 * np.pi * t_H / T_osc) * t_lb)
+    rho_de = omega_de * np.exp(_cumulative_simpson(3 * (1 + w), step))
+    E2 = rho_m + rho_r + rho_de
+    dlnE = -(3 * rho_m + 4 * rho_r + 3 * (1 + w) * rho_de) / (2 * E2)
+
+    return -(2 + dlnE), 1.5 * rho_m / E2
+
+
+def _integrate_growth(
+    P: np.ndarray,
+    Q: np.ndarray,
+    u_max: float,
+    z_out: np.ndarray,
+    D_init: np.ndarray,
+    dD_init: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Fixed-step RK4 for D'' = P D' + Q D in x = ln a, from u = u_max to 0.
+
+    P and Q are tabulated on the step and half-step grid in u = ln(1+z),
+    descending from u_max to 0 (shape (2 n_steps + 1, ...)), and broadcast
+    against the initial values. Results at z_out come from cubic Hermite
+    interpolation between steps.
+
+    Returns
+    -------
+    D_out, dD_out : array
+        D and dD/d ln a at z_out, shape (n_z,) + D_init.shape
+    D_today : array
+        D at z = 0
+    """
+    n_steps = (P.shape[0] - 1) // 2
+    dx = u_max / n_steps
+
+    D, dD = D_init, dD_init
+    D_steps = np.empty((n_steps + 1,) + np.shape(D_init))
+    dD_steps = np.empty_like(D_steps)
+    D_steps[0], dD_steps[0] = D, dD
+
+    for k in range(n_steps):
+        j = 2 * k
+        k1_D, k1_dD = dD, P[j] * dD + Q[j] * D
+        D2, dD2 = D + 0.5 * dx * k1_D, dD + 0.5 * dx * k1_dD
+        k2_D, k2_dD = dD2, P[j + 1] * dD2 + Q[j + 1] * D2
+        D3, dD3 = D + 0.5 * dx * k2_D, dD + 0.5 * dx * k2_dD
+        k3_D, k3_dD = dD3, P[j + 1] * dD3 + Q[j + 1] * D3
+        D4, dD4 = D + dx * k3_D, dD + dx * k3_dD
+        k4_D, k4_dD = dD4, P[j + 2] * dD4 + Q[j + 2] * D4
+
+        D = D + dx / 6 * (k1_D + 2 * k2_D + 2 * k3_D + k4_D)
+        dD = dD + dx / 6 * (k1_dD + 2 * k2_dD + 2 * k3_dD + k4_dD)
+        D_steps[k + 1], dD_steps[k + 1] = D, dD
+
+    # Cubic Hermite interpolation to the requested redshifts
+    d2D_steps = P[::2] * dD_steps + Q[::2] * D_steps
+    s = (u_max - np.log1p(z_out)) / dx
+    k = np.clip(s.astype(int), 0, n_steps - 1)
+    t = (s - k).reshape((-1,) + (1,) * np.ndim(D_init))
+    h00, h10 = 2 * t**3 - 3 * t**2 + 1, t**3 - 2 * t**2 + t
+    h01, h11 = -2 * t**3 + 3 * t**2, t**3 - t**2
+    D_out = (
+        h00 * D_steps[k]
+        + h10 * dx * dD_steps[k]
+        + h01 * D_steps[k + 1]
+        + h11 * dx * dD_steps[k + 1]
+    )
+    dD_out = (
+        h00 * dD_steps[k]
+        + h10 * dx * d2D_steps[k]
+        + h01 * dD_steps[k + 1]
+        + h11 * dx * d2D_steps[k + 1]
+    )
+
+    return D_out, dD_out, D_steps[-1]
+
+
+def _solve_chunk(args) -> Dict[str, np.ndarray]:
+    """
+    Integrate one chunk of cosmologies; see `solve_growth_batch`.
+    """
+    omega_m, A_w, T_osc, z_out, n_steps, z_init = args
+    if np.any(z_out > z_init) or np.any(z_out < 0):
+        raise ValueError(f"Redshift outside solved range [0, {z_init}]")
+
+    # Step and half-step grid in x = ln a, ascending; u = -x
+    u_max = np.log1p(z_init)
+    dx = u_max / n_steps
+    u = u_max - 0.5 * dx * np.arange(2 * n_steps + 1)
+    P, Q = _growth_coefficients(u[::-1], omega_m, A_w, T_osc)
+
+    # Growing mode in matter domination: D = a
+    a_init = 1 / (1 + z_init)
+    D_init = np.full(omega_m.shape, a_init)
+    D_out, dD_out, D_today = _integrate_growth(
+        P[::-1], Q[::-1], u_max, z_out, D_init, D_init
+    )
+
+    return {
+        "growth_today": D_today,
+        "D_plus": (D_out / D_today).T,
+        "f": (dD_out / D_out).T,
+    }
+
+
+def solve_growth_batch(
+    omega_m,
+    A_w,
+    T_osc,
+    z: np.ndarray = (0.0,),
+    n_steps: int = 256,
+    z_init: float = 1000,
+    sigma8_cmb: float = 0.811,
+    chunk_size: int = 1024,
+    processes: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Growth factor, growth rate and S₈ for N cosmologies at once.
+
+    With the default 256 steps, D₊ and f agree with
+    `GrowthFactorCalculator.solve_growth` to ~1e-7 over the prior box.
+
+    Parameters
+    ----------
+    omega_m, A_w, T_osc : float or array-like
+        Cosmological parameters, broadcast to a common shape (N,)
+    z : array-like
+        Output redshifts in [0, z_init], shape (n_z,)
+    n_steps : int
+        RK4 steps in ln a between z_init and 0
+    z_init : float
+        Starting redshift (matter domination, D = a)
+    sigma8_cmb : float
+        σ₈ of the ΛCDM reference, as in `GrowthFactorCalculator.calculate_s8`
+    chunk_size : int
+        Cosmologies integrated together; bounds memory to
+        ~2 × (2 n_steps + 1) × chunk_size values
+    processes : int, optional
+        Number of worker processes; chunks are solved serially if None
+
+    Returns
+    -------
+    results : dict
+        'D_plus' and 'f', shape (N, n_z), with D₊ normalized to D₊(0) = 1;
+        'growth_today', shape (N,), D₊(0) for D = a at early times; and
+        'S8', shape (N,), scaled by D₊(0) relative to ΛCDM with the same Ω_m
+    """
+    omega_m, A_w, T_osc = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(p, dtype=float)) for p in (omega_m, A_w, T_osc))
+    )
+    z = np.atleast_1d(np.asarray(z, dtype=float))
+
+    # ΛCDM references for every distinct Ω_m share the batch
+    omega_m_ref, inverse = np.unique(omega_m, return_inverse=True)
+    n = omega_m.size
+    params = (
+        np.concatenate([omega_m, omega_m_ref]),
+        np.concatenate([A_w, np.zeros_like(omega_m_ref)]),
+        np.concatenate([T_osc, np.ones_like(omega_m_ref)]),
+    )
+
+    tasks = [
+        (*(p[start : start + chunk_size] for p in params), z, n_steps, z_init)
+        for start in range(0, params[0].size, chunk_size)
+    ]
+    if processes is None:
+        chunks = [_solve_chunk(task) for task in tasks]
+    else:
+        with Pool(processes) as pool:
+            chunks = pool.map(_solve_chunk, tasks)
+
+    results = {
+        key: np.concatenate([chunk[key] for chunk in chunks]) for key in chunks[0]
+    }
+    growth_ref = results["growth_today"][n:][inverse]
+    results = {key: value[:n] for key, value in results.items()}
+    results["S8"] = (
+        sigma8_cmb * results["growth_today"] / growth_ref * np.sqrt(omega_m / 0.3)
+    )
+
+    return results
+
+
+def main():
+    """
+    Time the batched engine against the number of cosmologies.
+    """
+    import time
+
+    print("Batched Growth Factor Engine")
+    print("============================")
+
+    rng = np.random.default_rng(42)
+    for n in [100, 1000, 10000, 100000]:
+        omega_m = rng.uniform(0.25, 0.35, n)
+        A_w = rng.uniform(0.001, 0.005, n)
+        T_osc = rng.uniform(1.5, 2.5, n)
+
+        start = time.perf_counter()
+        results = solve_growth_batch(omega_m, A_w, T_osc)
+        elapsed = time.perf_counter() - start
+
+        print(
+            f"N = {n:<7d} {elapsed:8.3f} s  "
+            f"({elapsed / n * 1e6:6.1f} µs/cosmology)  "
+            f"S₈ = {np.mean(results['S8']):.4f} ± {np.std(results['S8']):.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Growth Factor Emulator
+======================
+
+Polynomial-chaos surrogate for the exact growth factor D₊(z; Ω_m, A_w,
+T_osc). The emulator is trained once on exact `GrowthFactorCalculator`
+solves over a Latin hypercube design, saved to disk, and then evaluated
+in microseconds. It refuses to extrapolate outside its training box.
+"""
+
+import argparse
+import itertools
+import os
+import sys
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from numpy.polynomial import legendre
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from growth_factor import GrowthFactorCalculator, Omega_m0
+
+# Parameter order of the emulator inputs
+PARAM_NAMES = ["omega_m", "A_w", "T_osc"]
+
+
+def default_bounds() -> Dict[str, Tuple[float, float]]:
+    """
+    Training box from the Bayesian analysis priors.
+
+    A_w and T_osc follow `BayesianAnalyzer.prior_ranges_osc`; Ω_m, which
+    the oscillating model does not sample, follows the ΛCDM prior.
+    """
+    from bayesian_analysis import BayesianAnalyzer
+
+    analyzer = BayesianAnalyzer({})
+    return {
+        "omega_m": analyzer.prior_ranges_lcdm["Omega_m"],
+        "A_w": analyzer.prior_ranges_osc["A_w"],
+        "T_osc": analyzer.prior_ranges_osc["T"],
+    }
+
+
+def _legendre_matrix(degree: int) -> np.ndarray:
+    """Monomial coefficients of P_0..P_degree, one polynomial per row."""
+    M = np.zeros((degree + 1, degree + 1))
+    for n in range(degree + 1):
+        M[n, : n + 1] = legendre.leg2poly(np.eye(degree + 1)[n, : n + 1])
+    return M
+
+
+def _chebyshev_values(s: np.ndarray, degree: int) -> np.ndarray:
+    """Chebyshev polynomials T_0..T_degree at s, stacked on the last axis."""
+    return np.cos(np.arccos(s)[..., None] * np.arange(degree + 1))
+
+
+def latin_hypercube(n: int, ndim: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Latin hypercube design of n points in the unit cube.
+    """
+    u = (np.arange(n)[:, None] + rng.random((n, ndim))) / n
+    for j in range(ndim):
+        u[:, j] = u[rng.permutation(n), j]
+    return u
+
+
+class GrowthEmulator:
+    """
+    Surrogate for D₊(z)/D₊(0) and the early-normalized D₊(0).
+
+    D₊ is expanded in a total-degree Legendre basis in the (scaled)
+    parameters times a Chebyshev basis in ln(1+z), so one evaluation is a
+    pair of small matrix products.
+    """
+
+    def __init__(
+        self,
+        bounds: Dict[str, Tuple[float, float]],
+        coeffs: np.ndarray,
+        multi_index: np.ndarray,
+        z_max: float,
+        validation: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Parameters
+        ----------
+        bounds : dict
+            (low, high) for each name in PARAM_NAMES; the training box
+        coeffs : array
+            Shape (n_terms, n_cheb + 1); the last column emulates D₊(0)
+        multi_index : array
+            Legendre degrees per parameter for each term, shape (n_terms, 3)
+        z_max : float
+            Highest emulated redshift
+        validation : dict, optional
+            Hold-out errors recorded at training time
+        """
+        self.bounds = {name: tuple(bounds[name]) for name in PARAM_NAMES}
+        self.coeffs = coeffs
+        self.multi_index = multi_index
+        self.z_max = z_max
+        self.validation = validation or {}
+
+        self._lo = np.array([self.bounds[name][0] for name in PARAM_NAMES])
+        self._hi = np.array([self.bounds[name][1] for name in PARAM_NAMES])
+        self._inv_half_width = 2 / (self._hi - self._lo)
+        degree = int(multi_index.max())
+        self._powers = np.arange(degree + 1)
+        self._legendre_T = _legendre_matrix(degree).T
+        self._u_max = np.log1p(z_max)
+
+    @staticmethod
+    def _basis_index(degree: int) -> np.ndarray:
+        """Total-degree multi-indices for three parameters."""
+        return np.array(
+            [
+                idx
+                for idx in itertools.product(range(degree + 1), repeat=3)
+                if sum(idx) <= degree
+            ]
+        )
+
+    @staticmethod
+    def _cheb_nodes(n_cheb: int, u_max: float) -> np.ndarray:
+        """Chebyshev nodes in u = ln(1+z) on [0, u_max]."""
+        k = np.arange(n_cheb)
+        return 0.5 * u_max * (1 - np.cos(np.pi * (k + 0.5) / n_cheb))
+
+    def _scale(self, theta: np.ndarray) -> np.ndarray:
+        """Map parameters to [-1, 1], refusing points outside the box."""
+        theta = np.atleast_2d(np.asarray(theta, dtype=float))
+        if (theta < self._lo).any() or (theta > self._hi).any():
+            raise ValueError(
+                f"Parameters outside the emulator training box {self.bounds}"
+            )
+        return (theta - self._lo) * self._inv_half_width - 1
+
+    def _param_basis(self, theta: np.ndarray) -> np.ndarray:
+        """Legendre basis values, shape (n_points, n_terms)."""
+        x = self._scale(theta)
+        # Legendre values P_k(x) from the monomials x^k, shape (n, 3, degree + 1)
+        P = (x[..., None] ** self._powers) @ self._legendre_T
+        mi = self.multi_index
+        return P[:, 0, mi[:, 0]] * P[:, 1, mi[:, 1]] * P[:, 2, mi[:, 2]]
+
+    def _z_basis(self, z: np.ndarray) -> np.ndarray:
+        """Chebyshev basis in ln(1+z), shape (n_z, n_cheb)."""
+        z = np.atleast_1d(np.asarray(z, dtype=float))
+        if z.min() < 0 or z.max() > self.z_max:
+            raise ValueError(f"Redshift outside emulated range [0, {self.z_max}]")
+        s = 2 * np.log1p(z) / self._u_max - 1
+        return _chebyshev_values(s, self.coeffs.shape[1] - 2)
+
+    def D_plus(self, z: np.ndarray, omega_m: float, A_w: float, T_osc: float):
+        """
+        Emulated D₊(z)/D₊(0) for one parameter set.
+        """
+        phi = self._param_basis([omega_m, A_w, T_osc])[0]
+        return self._z_basis(z) @ (phi @ self.coeffs[:, :-1])
+
+    def growth_today(self, omega_m: float, A_w: float, T_osc: float) -> float:
+        """
+        Emulated D₊(0) with the early-time normalization D = a.
+        """
+        phi = self._param_basis([omega_m, A_w, T_osc])[0]
+        return float(phi @ self.coeffs[:, -1])
+
+    def calculate_growth_factor(
+        self,
+        z: np.ndarray,
+        omega_m: float = Omega_m0,
+        A_w: float = 0.003,
+        T_osc: float = 2.0,
+    ) -> np.ndarray:
+        """
+        Emulated D₊(z)/D₊(0), as `GrowthFactorCalculator.calculate_growth_factor`
+        with exact=True; `EmulatedGrowthCalculator` wraps it in the
+        calculator's interface.
+
+        Raises
+        ------
+        ValueError
+            If the parameters or redshifts lie outside the training range
+        """
+        D = self.D_plus(z, omega_m, A_w, T_osc)
+        return D if np.ndim(z) else float(D[0])
+
+    @classmethod
+    def train(
+        cls,
+        bounds: Optional[Dict[str, Tuple[float, float]]] = None,
+        n_train: int = 256,
+        n_validate: int = 64,
+        degree: int = 6,
+        n_cheb: int = 16,
+        z_max: float = 10.0,
+        seed: int = 42,
+    ) -> "GrowthEmulator":
+        """
+        Train on exact solves over a Latin hypercube design.
+
+        Parameters
+        ----------
+        bounds : dict, optional
+            Training box; defaults to `default_bounds()`
+        n_train : int
+            Number of design points
+        n_validate : int
+            Number of random hold-out points for the validation error
+        degree : int
+            Total degree of the Legendre expansion in the parameters
+        n_cheb : int
+            Number of Chebyshev nodes in ln(1+z)
+        z_max : float
+            Highest emulated redshift
+        seed : int
+            Random seed for the design
+
+        Returns
+        -------
+        emulator : GrowthEmulator
+        """
+        bounds = bounds or default_bounds()
+        rng = np.random.default_rng(seed)
+        lo = np.array([bounds[name][0] for name in PARAM_NAMES])
+        hi = np.array([bounds[name][1] for name in PARAM_NAMES])
+        u_nodes = cls._cheb_nodes(n_cheb, np.log1p(z_max))
+        z_nodes = np.expm1(u_nodes)
+
+        def exact(theta):
+            calc = GrowthFactorCalculator(theta[0], True, theta[1], theta[2])
+            sol = calc.solve_growth()
+            return np.append(sol.D_plus(z_nodes), sol.growth_today)
+
+        theta_train = lo + (hi - lo) * latin_hypercube(n_train, 3, rng)
+        Y = np.array([exact(theta) for theta in theta_train])
+
+        # Node values -> Chebyshev coefficients in ln(1+z)
+        s_nodes = 2 * u_nodes / np.log1p(z_max) - 1
+        V = _chebyshev_values(s_nodes, n_cheb - 1)
+        Y[:, :-1] = np.linalg.solve(V, Y[:, :-1].T).T
+
+        multi_index = cls._basis_index(degree)
+        emulator = cls(
+            bounds, np.zeros((len(multi_index), n_cheb + 1)), multi_index, z_max
+        )
+        Phi = emulator._param_basis(theta_train)
+        emulator.coeffs = np.linalg.lstsq(Phi, Y, rcond=None)[0]
+
+        # Hold-out validation
+        theta_val = lo + (hi - lo) * rng.random((n_validate, 3))
+        z_val = np.linspace(0, z_max, 50)
+        err_D = 0.0
+        err_g = 0.0
+        for theta in theta_val:
+            calc = GrowthFactorCalculator(theta[0], True, theta[1], theta[2])
+            sol = calc.solve_growth()
+            err_D = max(
+                err_D,
+                np.max(np.abs(emulator.D_plus(z_val, *theta) - sol.D_plus(z_val))),
+            )
+            err_g = max(
+                err_g, abs(emulator.growth_today(*theta) / sol.growth_today - 1)
+            )
+        emulator.validation = {
+            "n_train": n_train,
+            "n_validate": n_validate,
+            "max_abs_error_D_plus": err_D,
+            "max_rel_error_growth_today": err_g,
+        }
+
+        return emulator
+
+    def save(self, path: str):
+        """Save the emulator to a `.npz` file."""
+        np.savez(
+            path,
+            coeffs=self.coeffs,
+            multi_index=self.multi_index,
+            z_max=self.z_max,
+            bounds=np.array([self.bounds[name] for name in PARAM_NAMES]),
+            validation_keys=np.array(list(self.validation.keys())),
+            validation_values=np.array(list(self.validation.values()), dtype=float),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "GrowthEmulator":
+        """Load an emulator saved with `save`."""
+        data = np.load(path)
+        bounds = dict(zip(PARAM_NAMES, map(tuple, data["bounds"])))
+        validation = {
+            str(key): float(value)
+            for key, value in zip(data["validation_keys"], data["validation_values"])
+        }
+        return cls(
+            bounds,
+            data["coeffs"],
+            data["multi_index"],
+            float(data["z_max"]),
+            validation,
+        )
+
+
+class EmulatedGrowthCalculator(GrowthFactorCalculator):
+    """
+    `GrowthFactorCalculator` whose exact growth factor comes from an emulator.
+
+    It takes the calculator's parameters and keeps its
+    `calculate_growth_factor(z, exact=..., method=...)` signature, so it can
+    replace a calculator in existing code. exact=True is served by the
+    emulator; the fitting formula (exact=False), and parameters or redshifts
+    outside the training range (e.g. ΛCDM, A_w = 0), use the calculator.
+    """
+
+    def __init__(
+        self,
+        emulator: GrowthEmulator,
+        omega_m: float = Omega_m0,
+        oscillating: bool = True,
+        A_w: float = 0.003,
+        T_osc: float = 2.0,
+        background=None,
+    ):
+        """
+        Parameters
+        ----------
+        emulator : GrowthEmulator
+            Trained emulator, e.g. from `GrowthEmulator.load`
+        omega_m, oscillating, A_w, T_osc, background
+            See `GrowthFactorCalculator`
+        """
+        super().__init__(omega_m, oscillating, A_w, T_osc, background)
+        self.emulator = emulator
+
+    def calculate_growth_factor(
+        self, z: np.ndarray, exact: bool = False, method: str = "lna"
+    ) -> np.ndarray:
+        """
+        Normalized growth factor D₊(z)/D₊(0), emulated if exact=True.
+        """
+        if exact:
+            A_w = self.A_w if self.oscillating else 0.0
+            try:
+                return self.emulator.calculate_growth_factor(
+                    z, self.omega_m, A_w, self.T_osc
+                )
+            except ValueError:
+                pass  # outside the training range
+        return super().calculate_growth_factor(z, exact, method)
+
+
+def main():
+    """
+    Train, validate and save the growth factor emulator.
+    """
+    import time
+
+    parser = argparse.ArgumentParser(description="Train the growth factor emulator")
+    parser.add_argument(
+        "--output", default="data/growth_emulator.npz", help="Output file"
+    )
+    parser.add_argument("--n-train", type=int, default=256, help="Design points")
+    parser.add_argument("--degree", type=int, default=6, help="Polynomial degree")
+    args = parser.parse_args()
+
+    print("Training growth factor emulator...")
+    start = time.perf_counter()
+    emulator = GrowthEmulator.train(n_train=args.n_train, degree=args.degree)
+    print(f"Trained in {time.perf_counter() - start:.1f} s")
+
+    for key, value in emulator.validation.items():
+        print(f"  {key}: {value:.3g}")
+
+    z = np.array([0.0, 0.5, 1.0, 2.0])
+    n_calls = 10000
+    start = time.perf_counter()
+    for _ in range(n_calls):
+        emulator.calculate_growth_factor(z)
+    elapsed = (time.perf_counter() - start) / n_calls
+    print(f"Evaluation: {elapsed * 1e6:.1f} µs per call")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    emulator.save(args.output)
+    print(f"Emulator saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,8 +9,12 @@ time-varying dark energy equation of state.
 """
 
 import argparse
-from typing import Optional, Tuple
+import sys
+import time
+from typing import Iterator, Optional, Tuple
 
+import cosmo_background
+import npy_stream
 import numpy as np
 from scipy import integrate
 from scipy.interpolate import interp1d
@@ -20,6 +24,111 @@ Omega_m0 = 0.315
 Omega_r0 = 9.24e-5
 Omega_DE0 = 1 - Omega_m0 - Omega_r0
 h = 0.674
+H0_Gyr = h * 100 / 3.086e19 * 3.156e16  # H0 in 1/Gyr
+
+# Parameters of the forward sensitivities, in the order returned by
+# `GrowthSolution.D_plus_gradient`
+SENSITIVITY_PARAMS = ("A_w", "T_osc", "omega_m")
+
+# Complex-step size for the sensitivity right-hand sides
+_COMPLEX_STEP = 1e-30
+
+
+class GrowthSolution:
+    """
+    Reusable dense-output solution of the growth equation in ln a.
+
+    Built by `GrowthFactorCalculator.solve_growth`; every query is a
+    polynomial evaluation of the solver's dense output, so D₊(z), f(z) and
+    fσ8(z) can be evaluated at arbitrary redshifts without re-solving. If
+    solved with sensitivity=True, the parameter derivatives of D₊ and f are
+    available as well.
+    """
+
+    def __init__(self, sol, z_init: float, sigma8_0: float = 0.811):
+        """
+        Parameters
+        ----------
+        sol : OdeSolution
+            Dense output over x = ln a of the state [D, dD/dln a, ln ρ_DE],
+            optionally followed by its derivative with respect to each of
+            SENSITIVITY_PARAMS
+        z_init : float
+            Starting redshift of the solve (upper end of the valid range)
+        sigma8_0 : float
+            Default σ₈ today for `sigma8` and `fsigma8`
+        """
+        self.sol = sol
+        self.z_init = z_init
+        self.sigma8_0 = sigma8_0
+
+        # D₊ today with the early-time normalization D = a
+        y_today = sol(0.0)
+        self.growth_today = float(y_today[0])
+
+        # ∂D₊(0)/∂p for p in SENSITIVITY_PARAMS, if solved for
+        self.growth_today_gradient = y_today[3::3] if y_today.size > 3 else None
+
+    def _state(self, z: np.ndarray) -> np.ndarray:
+        """State [D, dD/dln a, ln ρ_DE, sensitivities...] at redshift z."""
+        z = np.asarray(z, dtype=float)
+        if np.any(z > self.z_init) or np.any(z < 0):
+            raise ValueError(f"Redshift outside solved range [0, {self.z_init}]")
+        y = self.sol(-np.log1p(z).ravel())
+        return y.reshape((-1,) + z.shape)
+
+    def _sensitivities(self, z: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """D, dD/d ln a and their parameter derivatives at redshift z."""
+        if self.growth_today_gradient is None:
+            raise ValueError("Solution was computed without sensitivity=True")
+        y = self._state(z)
+        return y[0], y[1], y[3::3], y[4::3]
+
+    def D_plus(self, z: np.ndarray) -> np.ndarray:
+        """Normalized growth factor D₊(z)/D₊(0)."""
+        return self._state(z)[0] / self.growth_today
+
+    def f(self, z: np.ndarray) -> np.ndarray:
+        """Growth rate f(z) = d ln D₊/d ln a."""
+        y = self._state(z)
+        return y[1] / y[0]
+
+    def sigma8(self, z: np.ndarray, sigma8_0: Optional[float] = None) -> np.ndarray:
+        """σ₈(z) = σ₈,0 D₊(z)/D₊(0); σ₈,0 defaults to `self.sigma8_0`."""
+        if sigma8_0 is None:
+            sigma8_0 = self.sigma8_0
+        return sigma8_0 * self.D_plus(z)
+
+    def fsigma8(self, z: np.ndarray, sigma8_0: Optional[float] = None) -> np.ndarray:
+        """Growth observable fσ₈(z); σ₈,0 defaults to `self.sigma8_0`."""
+        if sigma8_0 is None:
+            sigma8_0 = self.sigma8_0
+        return sigma8_0 * self._state(z)[1] / self.growth_today
+
+    def D_plus_gradient(self, z: np.ndarray) -> np.ndarray:
+        """
+        Derivatives of D₊(z)/D₊(0) with respect to SENSITIVITY_PARAMS.
+
+        Returns
+        -------
+        dD : array
+            Shape (3,) + z.shape, in the order of SENSITIVITY_PARAMS
+        """
+        D, _, S_D, _ = self._sensitivities(z)
+        S_today = self.growth_today_gradient.reshape((3,) + (1,) * np.ndim(z))
+        return (S_D - D / self.growth_today * S_today) / self.growth_today
+
+    def f_gradient(self, z: np.ndarray) -> np.ndarray:
+        """
+        Derivatives of f(z) with respect to SENSITIVITY_PARAMS.
+
+        Returns
+        -------
+        df : array
+            Shape (3,) + z.shape, in the order of SENSITIVITY_PARAMS
+        """
+        D, dD, S_D, S_dD = self._sensitivities(z)
+        return (S_dD - dD / D * S_D) / D
 
 
 class GrowthFactorCalculator:
@@ -33,6 +142,7 @@ class GrowthFactorCalculator:
         oscillating: bool = True,
         A_w: float = 0.003,
         T_osc: float = 2.0,
+        background: Optional[cosmo_background.CosmologicalBackground] = None,
     ):
         """
         Initialize the growth factor calculator.
@@ -47,13 +157,47 @@ class GrowthFactorCalculator:
             Amplitude of w(z) oscillations
         T_osc : float
             Oscillation period in Gyr
+        background : CosmologicalBackground, optional
+            Shared tabulated background (see `cosmo_background.get_background`);
+            if given, E(z) is interpolated from it. Its Ω_m, Ω_DE and w(z)
+            parameters must match those of the calculator
         """
         self.omega_m = omega_m
         self.omega_r = Omega_r0
-        self.omega_de = 1 - omega_m - Omega_r0
         self.oscillating = oscillating
         self.A_w = A_w
         self.T_osc = T_osc
+        self.background = background
+
+        if background is not None:
+            A_w_eff = A_w if oscillating else 0.0
+            mismatch = [
+                f"{name} {theirs} != {ours}"
+                for name, theirs, ours in [
+                    ("omega_m", background.omega_m, self.omega_m),
+                    ("omega_de", background.omega_de, self.omega_de),
+                    ("A_w", background.A_w, A_w_eff),
+                    ("T_osc", background.T_osc if A_w_eff else T_osc, T_osc),
+                ]
+                if not np.isclose(theirs, ours, rtol=1e-10, atol=1e-12)
+            ]
+            if mismatch:
+                raise ValueError(
+                    "Background does not match the calculator: " + ", ".join(mismatch)
+                )
+
+        # Cached ln ρ_DE(z) table, keyed on the parameters it depends on
+        self._ln_rho_de_key = None
+        self._ln_rho_de_table = None
+
+        # Cached growth solution, keyed the same way
+        self._solution_key = None
+        self._solution = None
+
+    @property
+    def omega_de(self) -> float:
+        """Dark energy density parameter today (flat universe)."""
+        return 1 - self.omega_m - self.omega_r
 
     def w_de(self, z: np.ndarray) -> np.ndarray:
         """
@@ -95,37 +239,44 @@ class GrowthFactorCalculator:
         E : array-like
             E(z)
         """
+        if self.background is not None:
+            return self.background.E(z)
+
         # Matter and radiation
         E2 = self.omega_m * (1 + z) ** 3 + self.omega_r * (1 + z) ** 4
 
         # Dark energy with varying w(z)
         if self.oscillating:
-            # Integrate to get dark energy density
-            z_int = np.linspace(0, np.max(z), 1000)
-            w_int = self.w_de(z_int)
-
             # ρ_DE(z) = ρ_DE,0 * exp[3∫_0^z (1+w(z'))/1+z' dz']
-            integrand = 3 * (1 + w_int) / (1 + z_int)
-            integral = integrate.cumtrapz(integrand, z_int, initial=0)
-            rho_de_ratio = np.exp(integral)
-
-            # Interpolate to requested z values
-            f_interp = interp1d(
-                z_int, rho_de_ratio, kind="cubic", fill_value="extrapolate"
-            )
-            E2 += self.omega_de * f_interp(z)
+            E2 += self.omega_de * np.exp(self._ln_rho_de(z))
         else:
             E2 += self.omega_de
 
         return np.sqrt(E2)
 
+    def _ln_rho_de(self, z: np.ndarray) -> np.ndarray:
+        """
+        ln[ρ_DE(z)/ρ_DE,0] = 3∫_0^z (1+w(z'))/(1+z') dz' from a cached spline.
+
+        The spline is tabulated once and reused until `omega_m`, `A_w` or
+        `T_osc` change; tables are shared between calculators through
+        `cosmo_background.get_background`.
+        """
+        key = (self.omega_m, self.A_w, self.T_osc)
+        if key != self._ln_rho_de_key:
+            self._ln_rho_de_table = cosmo_background.get_background(
+                self.omega_m, self.omega_r, h, self.A_w, self.T_osc
+            )
+            self._ln_rho_de_key = key
+        return self._ln_rho_de_table.ln_rho_de(z)
+
     def growth_ode(self, z: float, y: np.ndarray) -> np.ndarray:
         """
         ODE system for growth factor evolution.
 
         d²D/dz² + (A/1+z)dD/dz + (B/(1+z)²)D = 0
 
-        where A and B depend on cosmology.
+        where A and B depend on cosmology (see `_growth_coefficients`).
 
         Parameters
         ----------
@@ -143,34 +294,258 @@ class GrowthFactorCalculator:
 
         # Cosmological parameters at z
         E = self.E_z(np.array([z]))[0]
-        Omega_m_z = self.omega_m * (1 + z) ** 3 / E**2
 
         # Dark energy equation of state
-        w = self.w_de(np.array([z]))[0]
+        w = np.atleast_1d(self.w_de(np.array([z])))[0]
         Omega_de_z = self.omega_de / E**2
         if self.oscillating:
             # Account for varying w(z)
-            z_int = np.linspace(0, z, 100)
-            w_int = self.w_de(z_int)
-            integrand = 3 * (1 + w_int) / (1 + z_int)
-            integral = integrate.simps(integrand, z_int)
-            Omega_de_z *= np.exp(integral)
-
-        # ODE coefficients
-        A = 1 + (1 + z) / (2 * E**2) * (
-            -3 * self.omega_m * (1 + z) ** 2
-            - 4 * self.omega_r * (1 + z) ** 3
-            - 3 * w * Omega_de_z * E**2
-        )
+            Omega_de_z *= np.exp(self._ln_rho_de(z))
 
-        B = 1.5 * Omega_m_z
+        A, B = self._growth_coefficients(z, E**2, w, Omega_de_z)
 
         # System of first-order ODEs
         d2Ddz2 = -A / (1 + z) * dDdz - B / (1 + z) ** 2 * D
 
         return np.array([dDdz, d2Ddz2])
 
-    def calculate_growth_factor(self, z: np.ndarray, exact: bool = False) -> np.ndarray:
+    def growth_ode_augmented(self, z: float, y: np.ndarray) -> np.ndarray:
+        """
+        Growth ODE with ln ρ_DE carried as an extra state variable.
+
+        d ln ρ_DE/dz = 3(1+w)/(1+z) is integrated alongside D, so every
+        evaluation is O(1): no table lookup and no nested quadrature.
+
+        Parameters
+        ----------
+        z : float
+            Redshift
+        y : array
+            [D, dD/dz, ln(ρ_DE/ρ_DE,0)]
+
+        Returns
+        -------
+        dydt : array
+            [dD/dz, d²D/dz², d ln ρ_DE/dz]
+        """
+        D, dDdz, ln_rho_de = y
+
+        w = np.atleast_1d(self.w_de(np.array([z])))[0]
+        rho_de = self.omega_de * np.exp(ln_rho_de)
+        E2 = self.omega_m * (1 + z) ** 3 + self.omega_r * (1 + z) ** 4 + rho_de
+
+        A, B = self._growth_coefficients(z, E2, w, rho_de / E2)
+        d2Ddz2 = -A / (1 + z) * dDdz - B / (1 + z) ** 2 * D
+
+        return np.array([dDdz, d2Ddz2, 3 * (1 + w) / (1 + z)])
+
+    def _growth_coefficients(
+        self, z: float, E2: float, w: float, Omega_de_z: float
+    ) -> Tuple[float, float]:
+        """
+        Coefficients A, B of the growth ODE in redshift.
+
+        From D'' + (d ln E/dz - 1/(1+z)) D' - 3/2 Ω_m(z)/(1+z)² D = 0 with
+        (1+z) d ln E/dz = [3Ω_m(1+z)³ + 4Ω_r(1+z)⁴]/(2E²) + 3/2 (1+w) Ω_DE(z).
+        """
+        A = (
+            (1 + z)
+            / (2 * E2)
+            * (3 * self.omega_m * (1 + z) ** 2 + 4 * self.omega_r * (1 + z) ** 3)
+            + 1.5 * (1 + w) * Omega_de_z
+            - 1
+        )
+
+        B = -1.5 * self.omega_m * (1 + z) ** 3 / E2
+
+        return A, B
+
+    def growth_ode_lna(self, x: float, y: np.ndarray) -> np.ndarray:
+        """
+        Growth ODE in x = ln a with ln ρ_DE carried as a state variable.
+
+        D'' + (2 + d ln E/d ln a) D' - 3/2 Ω_m(a) D = 0, where ' = d/d ln a.
+        The solution is smooth in ln a, so far fewer steps are needed than
+        when integrating in redshift.
+
+        Parameters
+        ----------
+        x : float
+            ln a
+        y : array
+            [D, dD/d ln a, ln(ρ_DE/ρ_DE,0)]
+
+        Returns
+        -------
+        dydx : array
+            [dD/d ln a, d²D/d ln a², d ln ρ_DE/d ln a]
+        """
+        D, dD, ln_rho_de = y
+        z = np.expm1(-x)
+
+        w = np.atleast_1d(self.w_de(np.array([z])))[0]
+        rho_m = self.omega_m * (1 + z) ** 3
+        rho_r = self.omega_r * (1 + z) ** 4
+        rho_de = self.omega_de * np.exp(ln_rho_de)
+        E2 = rho_m + rho_r + rho_de
+
+        dlnE = -(3 * rho_m + 4 * rho_r + 3 * (1 + w) * rho_de) / (2 * E2)
+        d2D = -(2 + dlnE) * dD + 1.5 * rho_m / E2 * D
+
+        return np.array([dD, d2D, -3 * (1 + w)])
+
+    def _w_params(self, z: float, A_w, T_osc, omega_m):
+        """
+        w(z) for explicit (possibly complex) parameter values.
+
+        Same model as `w_de`, written with complex-safe operations only so
+        that complex-step derivatives can be taken through it.
+        """
+        if not self.oscillating:
+            return -1.0
+        omega_de = 1 - omega_m - self.omega_r
+        t_lb = cosmo_background.lookback_time(z, omega_m, self.omega_r, omega_de)
+        return -1 + A_w * np.sin(2 * np.pi / T_osc * t_lb / H0_Gyr)
+
+    def _growth_rhs_params(self, x: float, y: np.ndarray, A_w, T_osc, omega_m):
+        """
+        Right-hand side of `growth_ode_lna` for explicit parameter values.
+        """
+        D, dD, ln_rho_de = y
+        z = np.expm1(-x)
+
+        w = self._w_params(z, A_w, T_osc, omega_m)
+        rho_m = omega_m * (1 + z) ** 3
+        rho_r = self.omega_r * (1 + z) ** 4
+        rho_de = (1 - omega_m - self.omega_r) * np.exp(ln_rho_de)
+        E2 = rho_m + rho_r + rho_de
+
+        dlnE = -(3 * rho_m + 4 * rho_r + 3 * (1 + w) * rho_de) / (2 * E2)
+        d2D = -(2 + dlnE) * dD + 1.5 * rho_m / E2 * D
+
+        return np.array([dD, d2D, -3 * (1 + w)])
+
+    def growth_ode_lna_sensitivity(self, x: float, y: np.ndarray) -> np.ndarray:
+        """
+        `growth_ode_lna` augmented with its forward sensitivity equations.
+
+        For each parameter p in SENSITIVITY_PARAMS the sensitivity
+        S_p = ∂y/∂p obeys dS_p/dx = J S_p + ∂F/∂p. That directional
+        derivative is taken in one complex-step evaluation,
+        Im F(y + iε S_p, p + iε)/ε, which is exact to rounding; the real
+        part of the same evaluation is F itself.
+
+        Parameters
+        ----------
+        x : float
+            ln a
+        y : array
+            [D, dD/d ln a, ln(ρ_DE/ρ_DE,0)] followed by S_p for each p
+
+        Returns
+        -------
+        dydx : array
+            Derivatives of all 12 state variables
+        """
+        params = np.array([self.A_w, self.T_osc, self.omega_m], dtype=complex)
+        dydx = np.empty(12)
+        for j in range(3):
+            p = params.copy()
+            p[j] += 1j * _COMPLEX_STEP
+            y_c = y[:3] + 1j * _COMPLEX_STEP * y[3 + 3 * j : 6 + 3 * j]
+            F = self._growth_rhs_params(x, y_c, *p)
+            dydx[3 + 3 * j : 6 + 3 * j] = F.imag / _COMPLEX_STEP
+        dydx[:3] = F.real
+
+        return dydx
+
+    def solve_growth(
+        self, z_init: float = 1000, rtol: float = 1e-8, sensitivity: bool = False
+    ) -> GrowthSolution:
+        """
+        Solve the growth equation once in ln a and return a reusable solution.
+
+        The result is cached and reused until `omega_m`, `oscillating`,
+        `A_w` or `T_osc` change.
+
+        Parameters
+        ----------
+        z_init : float
+            Starting redshift (matter domination, D = a)
+        rtol : float
+            Relative tolerance of the integrator
+        sensitivity : bool
+            If True, integrate the forward sensitivities with respect to
+            SENSITIVITY_PARAMS in the same solve (see
+            `growth_ode_lna_sensitivity`), enabling
+            `GrowthSolution.D_plus_gradient` and `GrowthSolution.f_gradient`
+
+        Returns
+        -------
+        solution : GrowthSolution
+        """
+        key = (self.omega_m, self.oscillating, self.A_w, self.T_osc, z_init, rtol)
+        if key != self._solution_key or (
+            sensitivity and self._solution.growth_today_gradient is None
+        ):
+            a_init = 1 / (1 + z_init)
+            y_init = [a_init, a_init, self._ln_rho_de_integral(z_init)]
+            rhs = self.growth_ode_lna
+            if sensitivity:
+                # D = a initially for all parameters; only ln ρ_DE depends on them
+                S_init = np.zeros((3, 3))
+                S_init[:, 2] = self._ln_rho_de_integral_gradient(z_init)
+                y_init = np.concatenate([y_init, S_init.ravel()])
+                rhs = self.growth_ode_lna_sensitivity
+
+            sol = integrate.solve_ivp(
+                rhs,
+                [np.log(a_init), 0],
+                y_init,
+                method="DOP853",
+                rtol=rtol,
+                atol=1e-12,
+                dense_output=True,
+            )
+            self._solution = GrowthSolution(sol.sol, z_init)
+            self._solution_key = key
+
+        return self._solution
+
+    def _ln_rho_de_integral(self, z: float) -> float:
+        """
+        ln ρ_DE(z)/ρ_DE,0 by direct quadrature in ln(1+z).
+
+        Used once per solve for the initial value of the augmented state.
+        """
+        if not self.oscillating:
+            return 0.0
+        integrand = lambda x: 3 * (1 + self.w_de(np.array([np.expm1(x)])))
+        value, _ = integrate.quad(integrand, 0, np.log1p(z), limit=200)
+        return value
+
+    def _ln_rho_de_integral_gradient(self, z: float) -> np.ndarray:
+        """
+        Derivatives of `_ln_rho_de_integral(z)` with respect to
+        SENSITIVITY_PARAMS, by quadrature of complex-step derivatives of w.
+        """
+        gradient = np.zeros(3)
+        if not self.oscillating:
+            return gradient
+
+        params = np.array([self.A_w, self.T_osc, self.omega_m], dtype=complex)
+        for j in range(3):
+            p = params.copy()
+            p[j] += 1j * _COMPLEX_STEP
+            integrand = lambda x: (
+                3 * np.imag(self._w_params(np.expm1(x), *p)) / _COMPLEX_STEP
+            )
+            gradient[j], _ = integrate.quad(integrand, 0, np.log1p(z), limit=200)
+        return gradient
+
+    def calculate_growth_factor(
+        self, z: np.ndarray, exact: bool = False, method: str = "lna"
+    ) -> np.ndarray:
         """
         Calculate the normalized growth factor D₊(z)/D₊(0).
 
@@ -181,27 +556,47 @@ class GrowthFactorCalculator:
         exact : bool
             If True, use exact ODE integration (slower)
             If False, use fitting formula (faster)
+        method : str
+            Solver used when exact=True: 'lna' evaluates the cached ln a
+            solution (`solve_growth`); 'augmented' and 'table' integrate in
+            redshift with ln ρ_DE as an ODE state (`growth_ode_augmented`)
+            or from the cached spline (`growth_ode`). At about the same
+            cost, 'augmented' avoids the spline error of 'table' (max
+            |ΔD₊| ~3e-11 instead of ~2e-9, see `benchmark_growth`)
 
         Returns
         -------
         D : array-like
             Normalized growth factor
         """
-        if exact:
+        if exact and method == "lna":
+            D = self.solve_growth().D_plus(z)
+
+        elif exact:
             # Solve ODE from high redshift
             z_init = 1000
             D_init = 1 / (1 + z_init)  # Matter-dominated
             dDdz_init = -D_init / (1 + z_init)
 
+            if method == "augmented":
+                rhs = self.growth_ode_augmented
+                y_init = [D_init, dDdz_init, self._ln_rho_de_integral(z_init)]
+            elif method == "table":
+                rhs = self.growth_ode
+                y_init = [D_init, dDdz_init]
+            else:
+                raise ValueError(f"Unknown method '{method}'")
+
             # Integrate from z_init to 0
-            z_solve = np.concatenate([[z_init], np.sort(z)[::-1], [0]])
+            z_solve = np.unique(np.concatenate([[z_init], z, [0]]))[::-1]
             sol = integrate.solve_ivp(
-                self.growth_ode,
+                rhs,
                 [z_init, 0],
-                [D_init, dDdz_init],
+                y_init,
                 t_eval=z_solve,
                 method="RK45",
                 rtol=1e-8,
+                atol=1e-12,
             )
 
             # Normalize by D(z=0)
@@ -237,7 +632,9 @@ class GrowthFactorCalculator:
 
         return D
 
-    def _redshift_to_lookback_time(self, z: np.ndarray) -> np.ndarray:
+    def _redshift_to_lookback_time(
+        self, z: np.ndarray, method: str = "auto"
+    ) -> np.ndarray:
         """
         Convert redshift to lookback time in Gyr using proper integration.
 
@@ -245,6 +642,10 @@ class GrowthFactorCalculator:
         ----------
         z : array-like
             Redshift
+        method : str
+            'analytic' (closed form plus radiation correction, see
+            `cosmo_background.lookback_time`) or 'quad' (per-point
+            integration). 'auto' selects 'analytic'.
 
         Returns
         -------
@@ -253,34 +654,38 @@ class GrowthFactorCalculator:
         """
         from scipy.integrate import quad
 
-        # Convert H0 to 1/Gyr
-        H0_Gyr = h * 100 / 3.086e19 * 3.156e16  # H0 in 1/Gyr
-
-        # Calculate lookback time for each redshift
         z = np.atleast_1d(z)
-        t_lb = np.zeros_like(z, dtype=float)
 
         # Use simple E(z) for ΛCDM to avoid recursion in oscillating case
         # This is accurate enough since oscillations have small amplitude (A_w ~ 0.003)
-        def E_z_simple(zp):
-            """Simple E(z) without dark energy oscillations"""
-            return np.sqrt(
-                self.omega_m * (1 + zp) ** 3
-                + self.omega_r * (1 + zp) ** 4
-                + self.omega_de
+        if method in ("auto", "analytic"):
+            t_lb = cosmo_background.lookback_time(
+                z, self.omega_m, self.omega_r, self.omega_de
             )
+        elif method == "quad":
+
+            def E_z_simple(zp):
+                """Simple E(z) without dark energy oscillations"""
+                return np.sqrt(
+                    self.omega_m * (1 + zp) ** 3
+                    + self.omega_r * (1 + zp) ** 4
+                    + self.omega_de
+                )
 
-        for i, zi in enumerate(z):
-            # Integrate dt/dz = -1/[(1+z)E(z)]
-            integrand = lambda zp: 1.0 / ((1 + zp) * E_z_simple(zp))
-            t_lb[i], _ = quad(integrand, 0, zi)
+            t_lb = np.zeros_like(z, dtype=float)
+            for i, zi in enumerate(z):
+                # Integrate dt/dz = -1/[(1+z)E(z)]
+                integrand = lambda zp: 1.0 / ((1 + zp) * E_z_simple(zp))
+                t_lb[i], _ = quad(integrand, 0, zi)
+        else:
+            raise ValueError(f"Unknown method '{method}'")
 
         # Convert to Gyr
         t_lb /= H0_Gyr
 
-        return t_lb if len(z) > 1 else float(t_lb)
+        return t_lb if len(z) > 1 else float(t_lb[0])
 
-    def calculate_s8(self, sigma8_cmb: float = 0.811) -> float:
+    def calculate_s8(self, sigma8_cmb: float = 0.811, exact: bool = False) -> float:
         """
         Calculate S₈ = σ₈√(Ω_m/0.3) including growth suppression.
 
@@ -288,14 +693,26 @@ class GrowthFactorCalculator:
         ----------
         sigma8_cmb : float
             σ₈ from CMB (at z~1100)
+        exact : bool
+            If True, scale σ₈ by the ratio of the exact D₊(0) to that of
+            ΛCDM with the same Ω_m, both normalized to D = a at early times
 
         Returns
         -------
         S8 : float
             S₈ parameter today
         """
-        # Growth from CMB to today
-        D_ratio = self.calculate_growth_factor(np.array([0]))[0]
+        if exact:
+            # Same primordial amplitude, different late-time growth
+            D_ratio = self.solve_growth().growth_today
+            if self.oscillating:
+                reference = GrowthFactorCalculator(self.omega_m, oscillating=False)
+                D_ratio /= reference.solve_growth().growth_today
+            else:
+                D_ratio = 1.0
+        else:
+            # Growth from CMB to today
+            D_ratio = self.calculate_growth_factor(np.array([0]))[0]
 
         # σ₈ today
         sigma8_0 = sigma8_cmb * D_ratio
@@ -306,6 +723,160 @@ class GrowthFactorCalculator:
         return S8
 
 
+def _iter_tokens(stream, block_size: int = 1 << 16) -> Iterator[str]:
+    """
+    Yield whitespace- or comma-separated tokens of a text stream.
+
+    The stream is read in blocks of `block_size` characters, so memory is
+    bounded even for a catalogue on a single line; '#' starts a comment
+    that runs to the end of the line.
+    """
+    carry = ""
+    in_comment = False
+    while True:
+        block = stream.read(block_size)
+        if not block:
+            break
+        if in_comment:
+            newline = block.find("\n")
+            if newline < 0:
+                continue
+            block, in_comment = block[newline + 1 :], False
+
+        text = carry + block
+        *lines, tail = text.split("\n")
+        for line in lines:
+            yield from line.split("#", 1)[0].replace(",", " ").split()
+
+        # The tail may end inside a comment or a token
+        if "#" in tail:
+            yield from tail.split("#", 1)[0].replace(",", " ").split()
+            carry, in_comment = "", True
+        else:
+            tokens = tail.replace(",", " ").split()
+            if tokens and not tail[-1].isspace() and tail[-1] != ",":
+                carry = tokens.pop()
+            else:
+                carry = ""
+            yield from tokens
+    yield from carry.split()
+
+
+def iter_redshift_chunks(source, chunk_size: int = 100_000) -> Iterator[np.ndarray]:
+    """
+    Read redshifts in chunks from a text stream or a `.npy` file.
+
+    Parameters
+    ----------
+    source : str or file
+        Path to a `.npy` file (memory-mapped), or a path or open text stream
+        with whitespace- or comma-separated redshifts; '#' starts a comment
+        that runs to the end of the line
+    chunk_size : int
+        Maximum number of redshifts per chunk
+
+    Yields
+    ------
+    z : np.ndarray
+        Redshifts of one chunk
+    """
+    if isinstance(source, str) and source.endswith(".npy"):
+        z = np.load(source, mmap_mode="r").ravel()
+        for start in range(0, len(z), chunk_size):
+            yield np.asarray(z[start : start + chunk_size], dtype=float)
+        return
+
+    stream = open(source) if isinstance(source, str) else source
+    try:
+        tokens = []
+        for token in _iter_tokens(stream):
+            tokens.append(token)
+            if len(tokens) == chunk_size:
+                yield np.array(tokens, dtype=float)
+                tokens = []
+        if tokens:
+            yield np.array(tokens, dtype=float)
+    finally:
+        if stream is not source:
+            stream.close()
+
+
+def bulk_growth(
+    source,
+    output,
+    fmt: str = "csv",
+    chunk_size: int = 100_000,
+    calc: Optional[GrowthFactorCalculator] = None,
+) -> Tuple[int, int, float]:
+    """
+    Stream D₊(z), f(z) and fσ8(z) for a redshift catalogue.
+
+    All chunks are evaluated through the single cached `solve_growth`
+    solution of `calc`, and results are written as they are produced, so
+    memory stays bounded by the chunk size. Redshifts outside the solved
+    range [0, z_init] are written with NaN results rather than aborting
+    a partly written output.
+
+    Parameters
+    ----------
+    source : str or file
+        Redshift input, see `iter_redshift_chunks`
+    output : str or file
+        Output path, or a text stream for fmt='csv'
+    fmt : str
+        'csv' (columns z, D_plus, f, fsigma8) or 'npy' (array of shape
+        (n, 4) with the same columns)
+    chunk_size : int
+        Redshifts per chunk
+    calc : GrowthFactorCalculator, optional
+        Cosmology; defaults to the oscillating model
+
+    Returns
+    -------
+    n_total : int
+        Number of redshifts processed
+    n_invalid : int
+        Number of redshifts outside the solved range (NaN results)
+    elapsed : float
+        Wall-clock time in seconds
+    """
+    if calc is None:
+        calc = GrowthFactorCalculator()
+
+    start = time.perf_counter()
+    solution = calc.solve_growth()
+
+    if fmt == "npy":
+        writer = npy_stream.NpyStreamWriter(output, row_shape=(4,))
+    elif fmt == "csv":
+        writer = open(output, "w") if isinstance(output, str) else output
+        writer.write("z,D_plus,f,fsigma8\n")
+    else:
+        raise ValueError(f"Unknown format '{fmt}'")
+
+    n_total = n_invalid = 0
+    try:
+        for z in iter_redshift_chunks(source, chunk_size):
+            valid = (z >= 0) & (z <= solution.z_init)
+            z_valid = z[valid]
+            rows = np.full((len(z), 4), np.nan)
+            rows[:, 0] = z
+            rows[valid, 1] = solution.D_plus(z_valid)
+            rows[valid, 2] = solution.f(z_valid)
+            rows[valid, 3] = solution.fsigma8(z_valid)
+            if fmt == "npy":
+                writer.append(rows)
+            else:
+                np.savetxt(writer, rows, fmt="%.8g", delimiter=",")
+            n_total += len(z)
+            n_invalid += len(z) - len(z_valid)
+    finally:
+        if writer is not output:
+            writer.close()
+
+    return n_total, n_invalid, time.perf_counter() - start
+
+
 def main():
     """
     Command-line interface for growth factor calculations.
@@ -329,9 +900,46 @@ def main():
     parser.add_argument(
         "--compare", action="store_true", help="Compare oscillating vs ΛCDM cosmology"
     )
+    parser.add_argument(
+        "--input",
+        "-i",
+        help="Bulk mode: redshift file (text or .npy), '-' for stdin",
+    )
+    parser.add_argument(
+        "--output", "-o", default="-", help="Bulk mode output file, '-' for stdout"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["csv", "npy"],
+        help="Bulk mode output format (default: from the output extension)",
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=100_000, help="Bulk mode chunk size"
+    )
 
     args = parser.parse_args()
 
+    if args.input is not None:
+        fmt = args.format or ("npy" if args.output.endswith(".npy") else "csv")
+        if fmt == "npy" and args.output == "-":
+            parser.error("npy output needs a file, not stdout")
+        source = sys.stdin if args.input == "-" else args.input
+        output = sys.stdout if args.output == "-" else args.output
+
+        n_total, n_invalid, elapsed = bulk_growth(source, output, fmt, args.chunk_size)
+        print(
+            f"Processed {n_total} redshifts in {elapsed:.2f} s "
+            f"({n_total / elapsed:.3g} z/s)",
+            file=sys.stderr,
+        )
+        if n_invalid:
+            print(
+                f"{n_invalid} redshifts outside the solved range were "
+                "written as NaN",
+                file=sys.stderr,
+            )
+        return
+
     z = np.array(args.redshift)
 
     if args.compare:
@@ -350,8 +958,8 @@ def main():
             ratio = D_osc[i] / D_lcdm[i]
             print(f"{z[i]:<6.2f} {D_osc[i]:<9.4f} {D_lcdm[i]:<9.4f} {ratio:.4f}")
 
-        print(f"\nS₈(oscillating) = {calc_osc.calculate_s8():.3f}")
-        print(f"S₈(ΛCDM) = {calc_lcdm.calculate_s8():.3f}")
+        print(f"\nS₈(oscillating) = {calc_osc.calculate_s8(exact=args.exact):.3f}")
+        print(f"S₈(ΛCDM) = {calc_lcdm.calculate_s8(exact=args.exact):.3f}")
 
     else:
         # Single calculation
@@ -365,7 +973,7 @@ def main():
         for i in range(len(z)):
             print(f"{z[i]:<6.2f} {D[i]:.4f}")
 
-        print(f"\nS₈ = {calc.calculate_s8():.3f}")
+        print(f"\nS₈ = {calc.calculate_s8(exact=args.exact):.3f}")
 
 
 if __name__ == "__main__":
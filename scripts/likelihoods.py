@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Dataset Likelihoods
+===================
+
+Likelihood objects for the datasets used in the Bayesian model comparison.
+Each dataset precomputes what it can in `prepare()` (sufficient statistics,
+the Cholesky factor of its covariance) so that `loglike(prediction)` is
+cheap, and carries a theory function per model that maps parameter vectors
+to its prediction, optionally with the Jacobian of that prediction so that
+`log_likelihood_gradient` is analytic (gradient-based samplers); terms
+without one fall back to finite differences. Datasets are built from the
+analyzer's data dictionary through a registry keyed by the dictionary keys;
+further datasets (BAO, SN, ...) can be registered or added directly with
+`BayesianAnalyzer.add_dataset`.
+"""
+
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from scipy.linalg import cholesky, solve_triangular
+
+# Theory function: parameter vectors (..., ndim) -> prediction (..., n_data)
+Theory = Callable[[np.ndarray], np.ndarray]
+
+# Relative step of the finite-difference gradient fallback, ~ eps^(1/3)
+_FD_STEP = 1e-5
+
+
+def finite_difference_gradient(
+    fn: Callable[[np.ndarray], np.ndarray], theta: np.ndarray
+) -> np.ndarray:
+    """
+    Central-difference gradient of a vectorized scalar function.
+
+    Parameters
+    ----------
+    fn : callable
+        Parameter vectors (..., ndim) -> values (...)
+    theta : array
+        Shape (..., ndim)
+
+    Returns
+    -------
+    gradient : array
+        Shape (..., ndim)
+    """
+    theta = np.asarray(theta, dtype=float)
+    ndim = theta.shape[-1]
+    h = _FD_STEP * np.maximum(np.abs(theta), 1e-3)
+    step = h[..., None, :] * np.eye(ndim)
+    values = fn(
+        np.concatenate([theta[..., None, :] + step, theta[..., None, :] - step], -2)
+    )
+    return (values[..., :ndim] - values[..., ndim:]) / (2 * h)
+
+
+class DatasetLikelihood:
+    """
+    Base class for a dataset likelihood.
+
+    Subclasses implement `prepare` and `loglike`; those that also
+    implement `loglike_gradient` set `has_analytic_gradient`. The theory
+    functions in `theory` and their Jacobians in `theory_gradient` are
+    keyed by model name ('oscillating', 'lcdm', ...).
+    """
+
+    # Whether the subclass implements loglike_gradient
+    has_analytic_gradient = False
+
+    def __init__(
+        self,
+        name: str,
+        theory: Optional[Dict[str, Theory]] = None,
+        theory_gradient: Optional[Dict[str, Theory]] = None,
+    ):
+        """
+        Parameters
+        ----------
+        name : str
+            Dataset name
+        theory : dict, optional
+            Model name -> function mapping parameter vectors of shape
+            (..., ndim) to predictions of shape (..., n_data)
+        theory_gradient : dict, optional
+            Model name -> Jacobian of the theory function, shape
+            (..., n_data, ndim), or (..., ndim) for scalar predictions
+        """
+        self.name = name
+        self.theory = dict(theory or {})
+        self.theory_gradient = dict(theory_gradient or {})
+        self.prepared = False
+
+    def prepare(self):
+        """Precompute everything that does not depend on the prediction."""
+        self.prepared = True
+
+    def loglike(self, prediction: np.ndarray) -> np.ndarray:
+        """Log likelihood of a prediction of shape (..., n_data)."""
+        raise NotImplementedError
+
+    def log_likelihood(self, model: str, theta: np.ndarray) -> np.ndarray:
+        """
+        Log likelihood of parameter vectors theta under `model`.
+        """
+        if model not in self.theory:
+            raise ValueError(f"Dataset '{self.name}' has no theory for model '{model}'")
+        if not self.prepared:
+            self.prepare()
+        return self.loglike(self.theory[model](theta))
+
+    def analytic_gradient(self, model: str) -> bool:
+        """Whether `log_likelihood_gradient` is analytic for `model`."""
+        return self.has_analytic_gradient and model in self.theory_gradient
+
+    def log_likelihood_gradient(self, model: str, theta: np.ndarray) -> np.ndarray:
+        """
+        Gradient of the log likelihood with respect to theta, (..., ndim).
+
+        Analytic by the chain rule if the dataset implements
+        `loglike_gradient` and has a theory Jacobian for `model`
+        (`analytic_gradient`), otherwise by central finite differences.
+        """
+        theta = np.asarray(theta, dtype=float)
+        if not self.analytic_gradient(model):
+            return finite_difference_gradient(
+                partial(self.log_likelihood, model), theta
+            )
+
+        if not self.prepared:
+            self.prepare()
+        g = self.loglike_gradient(self.theory[model](theta))
+        jacobian = self.theory_gradient[model](theta)
+        if jacobian.ndim == theta.ndim:  # scalar prediction
+            return g[..., None] * jacobian
+        return np.einsum("...i,...ij->...j", g, jacobian)
+
+
+class GaussianLikelihood(DatasetLikelihood):
+    """
+    Gaussian data vector with diagonal errors or a full covariance.
+
+    With a covariance C = L Lᵀ the χ² is |L⁻¹ r|², i.e. one triangular
+    solve per call (for all walkers at once); with diagonal errors it is
+    Σ(r/σ)². Constant normalization terms are dropped.
+    """
+
+    has_analytic_gradient = True
+
+    def __init__(
+        self,
+        name: str,
+        x: np.ndarray,
+        data: np.ndarray,
+        err: Optional[np.ndarray] = None,
+        cov: Optional[np.ndarray] = None,
+        theory: Optional[Dict[str, Theory]] = None,
+        theory_gradient: Optional[Dict[str, Theory]] = None,
+    ):
+        """
+        Parameters
+        ----------
+        name : str
+            Dataset name
+        x : array
+            Abscissa of the data points (e.g. redshifts), shape (n,)
+        data : array
+            Data vector, shape (n,)
+        err : array, optional
+            1σ errors, shape (n,); used if cov is None
+        cov : array, optional
+            Covariance matrix, shape (n, n)
+        theory, theory_gradient : dict, optional
+            See `DatasetLikelihood`
+        """
+        super().__init__(name, theory, theory_gradient)
+        if err is None and cov is None:
+            raise ValueError("Either err or cov must be given")
+        self.x = np.asarray(x, dtype=float)
+        self.data = np.asarray(data, dtype=float)
+        self.err = None if err is None else np.asarray(err, dtype=float)
+        self.cov = None if cov is None else np.asarray(cov, dtype=float)
+
+    def prepare(self):
+        """Factorize the covariance, or invert the diagonal errors."""
+        if self.cov is not None:
+            self._chol = cholesky(self.cov, lower=True)
+        else:
+            self._inv_err = 1 / self.err
+        self.prepared = True
+
+    def loglike(self, prediction: np.ndarray) -> np.ndarray:
+        """-χ²/2 for predictions of shape (..., n)."""
+        r = self.data - prediction
+        if self.cov is None:
+            return -0.5 * np.sum((r * self._inv_err) ** 2, axis=-1)
+
+        batch_shape = r.shape[:-1]
+        y = solve_triangular(
+            self._chol, r.reshape(-1, r.shape[-1]).T, lower=True, check_finite=False
+        )
+        return -0.5 * np.sum(y**2, axis=0).reshape(batch_shape)
+
+    def loglike_gradient(self, prediction: np.ndarray) -> np.ndarray:
+        """C⁻¹ r for predictions of shape (..., n)."""
+        r = self.data - prediction
+        if self.cov is None:
+            return r * self._inv_err**2
+
+        flat = r.reshape(-1, r.shape[-1]).T
+        y = solve_triangular(self._chol, flat, lower=True, check_finite=False)
+        x = solve_triangular(self._chol, y, lower=True, trans="T", check_finite=False)
+        return x.T.reshape(r.shape)
+
+
+class SampleMeanLikelihood(DatasetLikelihood):
+    """
+    Mean Gaussian χ² over a set of measurement samples.
+
+    -½ Σ(x_i - μ)²/σ² / n reduces to -½[(x̄ - μ)² + s²]/σ², so `prepare`
+    keeps only the count, mean and variance of the samples and every call
+    is O(1) in the number of samples.
+    """
+
+    has_analytic_gradient = True
+
+    def __init__(
+        self,
+        name: str,
+        samples: np.ndarray,
+        sigma: float,
+        theory: Optional[Dict[str, Theory]] = None,
+        theory_gradient: Optional[Dict[str, Theory]] = None,
+    ):
+        """
+        Parameters
+        ----------
+        name : str
+            Dataset name
+        samples : array
+            Measurement samples
+        sigma : float
+            Theory uncertainty σ
+        theory, theory_gradient : dict, optional
+            See `DatasetLikelihood`; predictions have shape (...,)
+        """
+        super().__init__(name, theory, theory_gradient)
+        self.samples = samples
+        self.sigma = sigma
+
+    def prepare(self):
+        """Reduce the samples to their sufficient statistics."""
+        if self.prepared:
+            return
+        self.n = len(self.samples)
+        self.mean = np.mean(self.samples)
+        self.var = np.var(self.samples)
+        self.samples = None  # not needed any more; keeps pickles small
+        self.prepared = True
+
+    def loglike(self, prediction: np.ndarray) -> np.ndarray:
+        """Mean -χ²/2 over the samples for predictions of shape (...)."""
+        return -0.5 * ((self.mean - prediction) ** 2 + self.var) / self.sigma**2
+
+    def loglike_gradient(self, prediction: np.ndarray) -> np.ndarray:
+        """(x̄ - μ)/σ² for predictions of shape (...)."""
+        return (self.mean - prediction) / self.sigma**2
+
+
+# Theory functions are module-level (bound with functools.partial) so that
+# datasets can be pickled to process-pool workers.
+
+
+def constant_theory(theta: np.ndarray, value: float) -> np.ndarray:
+    """The same prediction for every parameter vector."""
+    return np.full(np.shape(theta)[:-1], value)
+
+
+def parameter_theory(theta: np.ndarray, index: int) -> np.ndarray:
+    """A sampled parameter as the prediction."""
+    return np.asarray(theta, dtype=float)[..., index]
+
+
+def constant_theory_gradient(theta: np.ndarray, value: float) -> np.ndarray:
+    """Jacobian of `constant_theory`, (..., ndim)."""
+    return np.zeros(np.shape(theta))
+
+
+def parameter_theory_gradient(theta: np.ndarray, index: int) -> np.ndarray:
+    """Jacobian of `parameter_theory`, (..., ndim)."""
+    jacobian = np.zeros(np.shape(theta))
+    jacobian[..., index] = 1.0
+    return jacobian
+
+
+def w_oscillating(theta: np.ndarray, z: np.ndarray) -> np.ndarray:
+    """
+    Sinusoidal w(z) of the oscillating model, theta = [tau_0, f_osc, T, A_w].
+    """
+    theta = np.asarray(theta, dtype=float)
+    T = theta[..., 2, None]
+    A_w = theta[..., 3, None]
+    t_lb = np.log(1 + z) / 0.7  # Approximate lookback time
+    return -1 + A_w * np.sin(2 * np.pi * t_lb / T)
+
+
+def w_oscillating_gradient(theta: np.ndarray, z: np.ndarray) -> np.ndarray:
+    """Jacobian of `w_oscillating`, (..., n_z, 4)."""
+    theta = np.asarray(theta, dtype=float)
+    T = theta[..., 2, None]
+    A_w = theta[..., 3, None]
+    phase = 2 * np.pi * (np.log(1 + z) / 0.7) / T
+    jacobian = np.zeros(theta.shape[:-1] + np.shape(z) + (theta.shape[-1],))
+    jacobian[..., 2] = -A_w * np.cos(phase) * phase / T
+    jacobian[..., 3] = np.sin(phase)
+    return jacobian
+
+
+def w_lcdm(theta: np.ndarray, z: np.ndarray) -> np.ndarray:
+    """w(z) = -1 of a cosmological constant."""
+    return np.full(np.shape(theta)[:-1] + np.shape(z), -1.0)
+
+
+def w_lcdm_gradient(theta: np.ndarray, z: np.ndarray) -> np.ndarray:
+    """Jacobian of `w_lcdm`, (..., n_z, ndim)."""
+    return np.zeros(np.shape(theta)[:-1] + np.shape(z) + np.shape(theta)[-1:])
+
+
+# Data dictionary key -> factory building the dataset from its value
+DATASET_REGISTRY: Dict[str, Callable[[Any], DatasetLikelihood]] = {}
+
+
+def register_dataset(key: str):
+    """
+    Decorator registering a dataset factory for a data dictionary key.
+    """
+
+    def decorator(factory: Callable[[Any], DatasetLikelihood]):
+        DATASET_REGISTRY[key] = factory
+        return factory
+
+    return decorator
+
+
+@register_dataset("H0_samples")
+def _h0_samples(samples: np.ndarray) -> DatasetLikelihood:
+    # Oscillating model predicts the Planck value; ΛCDM samples H0 directly
+    return SampleMeanLikelihood(
+        "H0_samples",
+        samples,
+        sigma=0.5,
+        theory={
+            "oscillating": partial(constant_theory, value=67.4),
+            "lcdm": partial(parameter_theory, index=0),
+        },
+        theory_gradient={
+            "oscillating": partial(constant_theory_gradient, value=67.4),
+            "lcdm": partial(parameter_theory_gradient, index=0),
+        },
+    )
+
+
+@register_dataset("S8_samples")
+def _s8_samples(samples: np.ndarray) -> DatasetLikelihood:
+    # Theory predicts 5.2% suppression relative to ΛCDM
+    return SampleMeanLikelihood(
+        "S8_samples",
+        samples,
+        sigma=0.02,
+        theory={
+            "oscillating": partial(constant_theory, value=0.79),
+            "lcdm": partial(constant_theory, value=0.83),
+        },
+        theory_gradient={
+            "oscillating": partial(constant_theory_gradient, value=0.79),
+            "lcdm": partial(constant_theory_gradient, value=0.83),
+        },
+    )
+
+
+@register_dataset("w_measurements")
+def _w_measurements(measurements) -> DatasetLikelihood:
+    # (z, w, err) with per-point errors, or (z, w, cov) with a covariance
+    z, w_obs, uncertainty = measurements
+    z = np.asarray(z, dtype=float)
+    uncertainty = np.asarray(uncertainty, dtype=float)
+    full_cov = uncertainty.ndim == 2
+    return GaussianLikelihood(
+        "w_measurements",
+        z,
+        w_obs,
+        err=None if full_cov else uncertainty,
+        cov=uncertainty if full_cov else None,
+        theory={
+            "oscillating": partial(w_oscillating, z=z),
+            "lcdm": partial(w_lcdm, z=z),
+        },
+        theory_gradient={
+            "oscillating": partial(w_oscillating_gradient, z=z),
+            "lcdm": partial(w_lcdm_gradient, z=z),
+        },
+    )
+
+
+def build_datasets(data: Dict[str, Any]) -> List[DatasetLikelihood]:
+    """
+    Prepared dataset likelihoods for every registered key in `data`.
+    """
+    datasets = []
+    for key, value in data.items():
+        if key in DATASET_REGISTRY:
+            dataset = DATASET_REGISTRY[key](value)
+            dataset.prepare()
+            datasets.append(dataset)
+    return datasets
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+On-Disk MCMC Backend
+====================
+
+Checkpointed emcee backend storing the chain and log-probabilities as
+growing `.npy` files. Steps are buffered in memory and appended in blocks;
+after every block the RNG state and acceptance counts are written to a
+small checkpoint file, so an interrupted run can be resumed from its last
+block and the chain can be read (memory-mapped) while sampling continues.
+"""
+
+import os
+from typing import Dict, Optional
+
+import emcee
+import npy_stream
+import numpy as np
+
+
+class NpyBackend(emcee.backends.Backend):
+    """
+    emcee backend writing to `<path>/chain.npy`, `<path>/log_prob.npy` and
+    `<path>/state.npz`.
+
+    If `path` already holds a checkpoint the backend is opened at its last
+    completed block, and an `emcee.EnsembleSampler` created with it
+    continues from the stored walker positions and RNG state. Use `matches`
+    to check that the checkpoint belongs to the same run before resuming.
+    """
+
+    def __init__(self, path: str, block_size: int = 100, dtype=None, tag: str = ""):
+        """
+        Parameters
+        ----------
+        path : str
+            Directory of the chain files
+        block_size : int
+            Steps buffered in memory between checkpoints
+        dtype : data-type, optional
+            Storage type of the chain (default float64)
+        tag : str
+            Identifier of the run (e.g. model and a hash of the data),
+            stored with every checkpoint
+        """
+        super().__init__(dtype)
+        self.path = path
+        self.block_size = block_size
+        self.tag = tag
+        self.iteration = 0
+        self._target = 0
+        self._stored_tag = None
+
+        if os.path.exists(self._file("state.npz")):
+            self._load()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _init_buffers(self):
+        self._chain_buffer = np.empty(
+            (self.block_size, self.nwalkers, self.ndim), dtype=self.dtype
+        )
+        self._log_prob_buffer = np.empty(
+            (self.block_size, self.nwalkers), dtype=self.dtype
+        )
+        self._n_buffered = 0
+
+    def matches(self, nwalkers: int, ndim: int) -> bool:
+        """Whether the stored checkpoint has these dimensions and our tag."""
+        if not self.initialized:
+            return False
+        stored = (self.nwalkers, self.ndim, self._stored_tag)
+        return stored == (nwalkers, ndim, self.tag)
+
+    def reset(self, nwalkers: int, ndim: int):
+        """Start a new chain, overwriting any files in `path`."""
+        if self.initialized:
+            self._chain_writer.close()
+            self._log_prob_writer.close()
+        super().reset(nwalkers, ndim)
+        os.makedirs(self.path, exist_ok=True)
+        self._chain_writer = npy_stream.NpyStreamWriter(
+            self._file("chain.npy"), self.dtype, (self.nwalkers, self.ndim)
+        )
+        self._log_prob_writer = npy_stream.NpyStreamWriter(
+            self._file("log_prob.npy"), self.dtype, (self.nwalkers,)
+        )
+        self._chain_writer.flush()
+        self._log_prob_writer.flush()
+        self._init_buffers()
+        self._write_state()
+
+    def _load(self):
+        """Reopen the chain at its last checkpoint."""
+        with np.load(self._file("state.npz")) as state:
+            self.nwalkers, self.ndim = (int(n) for n in state["shape"])
+            self.iteration = int(state["iteration"])
+            self._stored_tag = str(state["tag"]) if "tag" in state else ""
+            self.accepted = state["accepted"]
+            self.blobs = None
+            self.random_state = None
+            if state["rng_keys"].size:
+                self.random_state = (
+                    "MT19937",
+                    state["rng_keys"],
+                    int(state["rng_pos"]),
+                    int(state["rng_has_gauss"]),
+                    float(state["rng_cached_gaussian"]),
+                )
+
+        # Steps written after the last checkpoint are discarded
+        self._chain_writer = npy_stream.NpyStreamWriter(
+            self._file("chain.npy"),
+            self.dtype,
+            (self.nwalkers, self.ndim),
+            mode="a",
+            n_rows=self.iteration,
+        )
+        self._log_prob_writer = npy_stream.NpyStreamWriter(
+            self._file("log_prob.npy"),
+            self.dtype,
+            (self.nwalkers,),
+            mode="a",
+            n_rows=self.iteration,
+        )
+        self._init_buffers()
+        self.initialized = True
+
+    def _write_state(self):
+        """Atomically replace the checkpoint file."""
+        if self.random_state is None:
+            rng = (np.zeros(0, dtype=np.uint32), 0, 0, 0.0)
+        else:
+            rng = self.random_state[1:]
+        tmp = self._file("state.tmp.npz")
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                shape=np.array([self.nwalkers, self.ndim]),
+                iteration=self.iteration,
+                tag=self.tag,
+                accepted=self.accepted,
+                rng_keys=rng[0],
+                rng_pos=rng[1],
+                rng_has_gauss=rng[2],
+                rng_cached_gaussian=rng[3],
+            )
+        os.replace(tmp, self._file("state.npz"))
+
+    def checkpoint(self):
+        """Append buffered steps to disk and write the checkpoint."""
+        n = self._n_buffered
+        if n:
+            self._chain_writer.append(self._chain_buffer[:n])
+            self._log_prob_writer.append(self._log_prob_buffer[:n])
+            self._chain_writer.flush()
+            self._log_prob_writer.flush()
+            self._n_buffered = 0
+        self._write_state()
+
+    def grow(self, ngrow: int, blobs):
+        """Record the end of the current run; storage grows on disk."""
+        if blobs is not None:
+            raise ValueError("NpyBackend does not store blobs")
+        self._target = self.iteration + ngrow
+
+    def save_step(self, state, accepted):
+        """Buffer one step, checkpointing after each full block."""
+        self._check(state, accepted)
+
+        self._chain_buffer[self._n_buffered] = state.coords
+        self._log_prob_buffer[self._n_buffered] = state.log_prob
+        self._n_buffered += 1
+        self.accepted += accepted
+        self.random_state = state.random_state
+        self.iteration += 1
+
+        if self._n_buffered == self.block_size or self.iteration >= self._target:
+            self.checkpoint()
+
+    def get_value(self, name: str, flat: bool = False, thin: int = 1, discard: int = 0):
+        """Stored steps from disk plus any still buffered in memory."""
+        if self.iteration <= 0:
+            raise AttributeError(
+                "you must run the sampler with 'store == True' before "
+                "accessing the results"
+            )
+        if name == "blobs":
+            return None
+
+        n_stored = self.iteration - self._n_buffered
+        v = getattr(self, f"_{name}_buffer")[: self._n_buffered]
+        if n_stored:
+            # Memory-mapped unless buffered steps have to be appended
+            stored = np.load(self._file(f"{name}.npy"), mmap_mode="r")[:n_stored]
+            v = np.concatenate([stored, v]) if self._n_buffered else stored
+
+        v = v[discard + thin - 1 : self.iteration : thin]
+        if flat:
+            return v.reshape((-1,) + v.shape[2:])
+        return v
+
+    def close(self):
+        """Checkpoint and close the chain files."""
+        self.checkpoint()
+        self._chain_writer.close()
+        self._log_prob_writer.close()
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+
+def read_chain(
+    path: str, discard: Optional[int] = None, flat: bool = False
+) -> Dict[str, np.ndarray]:
+    """
+    Memory-mapped view of the checkpointed part of an `NpyBackend` chain.
+
+    Safe to call while the sampler is still writing.
+
+    Parameters
+    ----------
+    path : str
+        Backend directory
+    discard : int, optional
+        Steps dropped as burn-in; defaults to half of the completed steps
+    flat : bool
+        Flatten the walker and step axes
+
+    Returns
+    -------
+    chain : dict
+        'chain' (n_steps, nwalkers, ndim), 'log_prob' (n_steps, nwalkers),
+        flattened across walkers if flat, and 'iteration'
+    """
+    with np.load(os.path.join(path, "state.npz")) as state:
+        iteration = int(state["iteration"])
+        nwalkers, ndim = (int(n) for n in state["shape"])
+    if discard is None:
+        discard = iteration // 2
+
+    result = {"iteration": iteration}
+    for name, shape in (("chain", (nwalkers, ndim)), ("log_prob", (nwalkers,))):
+        if iteration == 0:
+            # Nothing checkpointed; the file may not even hold a header yet
+            v = np.empty((0,) + shape)
+        else:
+            v = np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            v = v[discard:iteration]
+        result[name] = v.reshape((-1,) + v.shape[2:]) if flat else v
+    return result
@@ -7,17 +7,37 @@ Generate trace plots, convergence diagnostics, and posterior tables
 from the Bayesian analysis results.
 """
 
+import os
+import sys
+
 import corner
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
+from mcmc_backend import read_chain
 from scipy import stats
 
 
 def load_posterior_data(filename="data/posterior_v4.npz"):
     """
     Load posterior samples from Bayesian analysis.
+
+    `filename` may also be a checkpoint directory of `run_mcmc` (holding
+    `oscillating/` and `lcdm/` on-disk chains); the chains checkpointed so
+    far are then read without interrupting a running sampler, discarding
+    the first half as burn-in. Models without a checkpoint yet, or with no
+    stored iterations, are left out, as is the Bayes factor.
     """
+    if os.path.isdir(filename):
+        data = {}
+        for key, model in [("chains_osc", "oscillating"), ("chains_lcdm", "lcdm")]:
+            path = os.path.join(filename, model)
+            if os.path.isdir(path):
+                chain = read_chain(path, flat=True)["chain"]
+                if len(chain) > 0:
+                    data[key] = chain
+        return data
+
     try:
         data = np.load(filename, allow_pickle=True)
         return data
@@ -250,6 +270,9 @@ def plot_corner_plot(chains, param_names, save_path="plots/corner_plot.png"):
 def create_summary_figure(data, save_path="plots/mcmc_summary.png"):
     """
     Create a comprehensive summary figure.
+
+    Panels whose chains (or Bayes factor) are missing from `data`, as for
+    a checkpoint read mid-run, are left empty.
     """
     fig = plt.figure(figsize=(16, 10))
 
@@ -259,11 +282,14 @@ def create_summary_figure(data, save_path="plots/mcmc_summary.png"):
 
     # Oscillating model parameters
     param_names_osc = ["tau_0", "f_osc", "T", "A_w"]
-    chains_osc = data["chains_osc"]
+    chains_osc = data.get("chains_osc")
 
     # Posterior distributions
     for i in range(4):
         ax = plt.subplot(2, 4, i + 1)
+        if chains_osc is None or len(chains_osc) == 0:
+            _mark_unavailable(ax, param_names_osc[i])
+            continue
         ax.hist(chains_osc[:, i], bins=50, density=True, alpha=0.7, color="blue")
         ax.set_xlabel(param_names_osc[i])
         ax.set_ylabel("Density")
@@ -276,17 +302,23 @@ def create_summary_figure(data, save_path="plots/mcmc_summary.png"):
 
     # LCDM comparison
     ax5 = plt.subplot(2, 2, 3)
-    chains_lcdm = data["chains_lcdm"]
-    ax5.scatter(chains_lcdm[::10, 0], chains_lcdm[::10, 1], alpha=0.5, s=1)
-    ax5.set_xlabel("$H_0$ (km/s/Mpc)")
-    ax5.set_ylabel("$\\Omega_m$")
-    ax5.set_title("ΛCDM Posterior")
-    ax5.grid(True, alpha=0.3)
+    chains_lcdm = data.get("chains_lcdm")
+    if chains_lcdm is None or len(chains_lcdm) == 0:
+        _mark_unavailable(ax5, "ΛCDM Posterior")
+    else:
+        ax5.scatter(chains_lcdm[::10, 0], chains_lcdm[::10, 1], alpha=0.5, s=1)
+        ax5.set_xlabel("$H_0$ (km/s/Mpc)")
+        ax5.set_ylabel("$\\Omega_m$")
+        ax5.set_title("ΛCDM Posterior")
+        ax5.grid(True, alpha=0.3)
 
     # Bayes factor visualization
     ax6 = plt.subplot(2, 2, 4)
-    log_K = data["log_K"]
-    err_K = data["err_K"]
+    log_K = float(data.get("log_K", np.nan))
+    err_K = float(data.get("err_K", np.nan))
+    if not np.isfinite(log_K):
+        _mark_unavailable(ax6, "Bayes Factor")
+        return _save_summary(fig, save_path)
 
     # Jeffrey's scale
     scales = [0, 1, 2.3, 3.5, 5]
@@ -308,9 +340,22 @@ def create_summary_figure(data, save_path="plots/mcmc_summary.png"):
     ax6.legend(loc="right", bbox_to_anchor=(1.3, 0.5))
     ax6.set_xticks([])
 
-    plt.suptitle("MCMC Analysis Summary", fontsize=16)
-    plt.tight_layout()
-    plt.savefig(save_path, dpi=150, bbox_inches="tight")
+    return _save_summary(fig, save_path)
+
+
+def _mark_unavailable(ax, title):
+    """Blank a summary panel whose data is not available."""
+    ax.set_title(title)
+    ax.text(0.5, 0.5, "not available", ha="center", va="center", color="gray")
+    ax.set_xticks([])
+    ax.set_yticks([])
+
+
+def _save_summary(fig, save_path):
+    """Title, lay out and save the summary figure."""
+    fig.suptitle("MCMC Analysis Summary", fontsize=16)
+    fig.tight_layout()
+    fig.savefig(save_path, dpi=150, bbox_inches="tight")
     print(f"Summary figure saved to {save_path}")
 
     return fig
@@ -323,10 +368,13 @@ def main():
     print("MCMC Diagnostics and Posterior Analysis")
     print("=" * 50)
 
-    # Load data
-    data = load_posterior_data()
+    # Load data (posterior file, or a live checkpoint directory)
+    data = load_posterior_data(*sys.argv[1:2])
 
     # Extract chains
+    if "chains_osc" not in data:
+        print("\nNo oscillating-model samples available yet")
+        return
     chains_osc = data["chains_osc"]
 
     param_names_osc = ["tau_0", "f_osc", "T", "A_w"]
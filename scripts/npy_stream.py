@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Streaming NPY Writer
+====================
+
+Appends rows to a `.npy` file whose final length is not known in advance.
+The header is written with a fixed, padded size and rewritten in place on
+every flush, so memory use is independent of the number of rows and the
+file is a valid `.npy` (readable with `np.load(..., mmap_mode="r")`) after
+each flush.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Header length including magic string; large enough for any row count
+_HEADER_SIZE = 128
+
+
+class NpyStreamWriter:
+    """
+    Row-wise writer for a growing `.npy` array of shape (n_rows,) + row_shape.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        dtype="<f8",
+        row_shape: Tuple[int, ...] = (),
+        mode: str = "w",
+        n_rows: Optional[int] = None,
+    ):
+        """
+        Parameters
+        ----------
+        path : str
+            Output file
+        dtype : data-type
+            Element type of the array
+        row_shape : tuple of int
+            Shape of one row
+        mode : str
+            'w' to create or overwrite the file, 'a' to append to a file
+            written by this class
+        n_rows : int, optional
+            With mode='a', keep only the first n_rows rows (e.g. those
+            covered by a checkpoint) and append after them
+        """
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.row_shape = tuple(row_shape)
+
+        if mode == "w":
+            self.n_rows = 0
+            self._file = open(path, "wb")
+            self._write_header()
+        elif mode == "a":
+            existing = np.load(path, mmap_mode="r")
+            if existing.offset != _HEADER_SIZE:
+                raise ValueError(f"{path} was not written by NpyStreamWriter")
+            if existing.dtype != self.dtype or existing.shape[1:] != self.row_shape:
+                raise ValueError(f"{path} does not hold rows of {self.row_shape}")
+            self.n_rows = len(existing) if n_rows is None else n_rows
+            if self.n_rows > len(existing):
+                raise ValueError(f"{path} holds fewer than {n_rows} rows")
+            del existing
+
+            row_bytes = self.dtype.itemsize * int(np.prod(self.row_shape))
+            self._file = open(path, "r+b")
+            self._file.truncate(_HEADER_SIZE + self.n_rows * row_bytes)
+            self._write_header()
+        else:
+            raise ValueError(f"Unknown mode '{mode}'")
+
+    def _write_header(self):
+        """(Re)write the fixed-size header for the current row count."""
+        header = {
+            "descr": np.lib.format.dtype_to_descr(self.dtype),
+            "fortran_order": False,
+            "shape": (self.n_rows,) + self.row_shape,
+        }
+        text = repr(header).encode("latin1")
+        magic = np.lib.format.magic(1, 0)
+        n_pad = _HEADER_SIZE - len(magic) - 2 - len(text) - 1
+        if n_pad < 0:
+            raise ValueError("Array description too long for the fixed header")
+        text += b" " * n_pad + b"\n"
+
+        position = self._file.tell()
+        self._file.seek(0)
+        self._file.write(magic + np.uint16(len(text)).tobytes() + text)
+        if position > _HEADER_SIZE:
+            self._file.seek(position)
+
+    def append(self, rows: np.ndarray):
+        """Append rows of shape (n,) + row_shape."""
+        rows = np.ascontiguousarray(rows, dtype=self.dtype)
+        if rows.shape[1:] != self.row_shape:
+            raise ValueError(
+                f"Row shape {rows.shape[1:]} does not match {self.row_shape}"
+            )
+        self._file.seek(0, 2)
+        rows.tofile(self._file)
+        self.n_rows += len(rows)
+
+    def flush(self):
+        """Update the header so that the file holds all rows appended so far."""
+        self._write_header()
+        self._file.flush()
+
+    def close(self):
+        """Flush and close the file."""
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self) -> "NpyStreamWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
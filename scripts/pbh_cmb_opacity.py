@@ -50,7 +50,7 @@ class PBHOpacity:
     Calculate CMB optical depth from PBH accretion.
     """
 
-    def __init__(self, f_pbh=0.01, M_pbh=1e-11, f_osc=0.10):
+    def __init__(self, f_pbh=0.01, M_pbh=1e-11, f_osc=0.10, background=None):
         """
         Initialize PBH parameters.
 
@@ -62,10 +62,14 @@ class PBHOpacity:
             PBH mass in solar masses
         f_osc : float
             Oscillating fraction (affects accretion)
+        background : CosmologicalBackground, optional
+            Shared tabulated background (see `cosmo_background.get_background`)
+            providing H(z); defaults to flat ΛCDM with the module parameters
         """
         self.f_pbh = f_pbh
         self.M_pbh = M_pbh * M_sun  # Convert to kg
         self.f_osc = f_osc
+        self.background = background
 
         # Derived parameters
         self.n_pbh_0 = self._pbh_number_density()
@@ -177,7 +181,7 @@ class PBHOpacity:
             n_e = x_e * n_H
 
             # Hubble parameter
-            H_z = H0 * np.sqrt(Omega_m * (1 + z) ** 3 + Omega_Lambda)
+            H_z = H0 * self.E(z)
 
             return n_e * sigma_T * c / (H_z * (1 + z))
 
@@ -187,6 +191,12 @@ class PBHOpacity:
         # Return total optical depth
         return tau_total
 
+    def E(self, z):
+        """Dimensionless Hubble parameter E(z) = H(z)/H₀."""
+        if self.background is not None:
+            return self.background.E(z)
+        return np.sqrt(Omega_m * (1 + z) ** 3 + Omega_Lambda)
+
     def _ionization_fraction(self, z):
         """
         Ionization fraction including PBH contribution.
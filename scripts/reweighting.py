@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Importance Reweighting
+======================
+
+Reuses existing posterior samples for a different prior or likelihood.
+Samples drawn (possibly with weights) from p_old ∝ L_old π_old are
+reweighted by r = L_new π_new / (L_old π_old), evaluated for all samples at
+once, which gives the new posterior and the evidence ratio
+Z_new/Z_old = E_old[r] without new likelihood calls. The effective sample
+size of the reweighted set tells whether this is accurate or whether the
+new target has to be sampled directly. Both posteriors must be normalized
+consistently (normalized priors), and the support of the new posterior
+must lie inside that of the samples.
+
+The error of ln(Z_new/Z_old) is the delta-method standard deviation of the
+weighted mean E_old[r] = Σ w_i r_i, Var ≈ Σ w_i² (r_i - E_old[r])², divided
+by E_old[r]; in terms of the old and new normalized weights this is
+sqrt(Σ (w_new,i - w_i)²). It treats the samples as independent; for
+correlated (MCMC) samples with integrated autocorrelation time τ the error
+is scaled by sqrt(τ) and the effective sample size divided by τ.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+from scipy.special import logsumexp
+
+
+def effective_sample_size(weights: np.ndarray) -> float:
+    """Kish effective sample size (Σw)²/Σw² of a set of weights."""
+    weights = np.asarray(weights, dtype=float)
+    return float(np.sum(weights) ** 2 / np.sum(weights**2))
+
+
+def reweight(
+    log_prob_old: np.ndarray,
+    log_prob_new: np.ndarray,
+    weights: Optional[np.ndarray] = None,
+    tau: float = 1.0,
+) -> Dict[str, np.ndarray]:
+    """
+    Importance weights of samples for a new target density.
+
+    Parameters
+    ----------
+    log_prob_old : array
+        Unnormalized log density the samples were drawn from, ln(L_old
+        π_old), shape (n,)
+    log_prob_new : array
+        New unnormalized log density ln(L_new π_new), shape (n,)
+    weights : array, optional
+        Weights of the samples under the old density (e.g. from nested
+        sampling); equal weights by default
+    tau : float
+        Integrated autocorrelation time of the samples; for an ensemble
+        chain flattened across walkers, the τ in steps of each walker
+        (`emcee.autocorr.integrated_time`). 1 for independent samples
+
+    Returns
+    -------
+    result : dict
+        Normalized 'weights' under the new density, their effective
+        sample size 'ess', 'log_evidence_ratio' ln(Z_new/Z_old) and its
+        'log_evidence_ratio_error'
+    """
+    log_prob_old = np.asarray(log_prob_old, dtype=float)
+    log_prob_new = np.asarray(log_prob_new, dtype=float)
+    if weights is None:
+        weights = np.ones_like(log_prob_old)
+    weights = np.asarray(weights, dtype=float) / np.sum(weights)
+
+    if np.any(np.isfinite(log_prob_new) & ~np.isfinite(log_prob_old)):
+        raise ValueError("New density is positive where the samples have none")
+    valid = weights > 0
+    log_r = np.full(log_prob_old.shape, -np.inf)
+    log_r[valid] = log_prob_new[valid] - log_prob_old[valid]
+
+    log_w = np.full(log_r.shape, -np.inf)
+    log_w[valid] = log_r[valid] + np.log(weights[valid])
+    log_ratio = logsumexp(log_w)
+    new_weights = np.exp(log_w - log_ratio)
+
+    return {
+        "weights": new_weights,
+        "ess": effective_sample_size(new_weights) / tau,
+        "log_evidence_ratio": float(log_ratio),
+        "log_evidence_ratio_error": float(
+            np.sqrt(tau * np.sum((new_weights - weights) ** 2))
+        ),
+    }
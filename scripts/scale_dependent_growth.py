@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Scale-Dependent Growth
+======================
+
+Linear growth D(k, z) when a fraction f_osc of the dark matter oscillates
+and does not cluster below its Jeans length. All k modes share one
+background table and are integrated together as a single vectorized ODE
+system, giving an (n_k, n_z) growth table for power-spectrum modules.
+"""
+
+import os
+import sys
+from typing import Dict
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from growth_batch import _growth_coefficients, _integrate_growth
+from growth_factor import Omega_m0
+
+
+class ScaleDependentGrowth:
+    """
+    Growth of matter perturbations with a partially oscillating component.
+
+    Only the clustering part of the dark matter sources the growth:
+
+        D'' + (2 + d ln E/d ln a) D' = 3/2 Ω_m(a) μ(k, a) D,
+        μ(k, a) = 1 - f_osc k²/(k² + k_J(a)²),
+
+    so modes with k ≪ k_J grow as in the scale-independent case and modes
+    with k ≫ k_J feel only (1 - f_osc) of the matter. The Jeans scale of an
+    oscillating component grows as k_J ∝ a^(1/4) in matter domination.
+    """
+
+    def __init__(
+        self,
+        omega_m: float = Omega_m0,
+        f_osc: float = 0.10,
+        k_J0: float = 0.1,
+        A_w: float = 0.003,
+        T_osc: float = 2.0,
+        n_steps: int = 256,
+        z_init: float = 1000,
+    ):
+        """
+        Initialize and tabulate the shared background.
+
+        Parameters
+        ----------
+        omega_m : float
+            Matter density parameter today
+        f_osc : float
+            Oscillating fraction of the dark matter
+        k_J0 : float
+            Jeans wavenumber today in Mpc⁻¹
+        A_w : float
+            Amplitude of w(z) oscillations
+        T_osc : float
+            Oscillation period in Gyr
+        n_steps : int
+            RK4 steps in ln a between z_init and 0
+        z_init : float
+            Starting redshift (matter domination)
+        """
+        self.omega_m = omega_m
+        self.f_osc = f_osc
+        self.k_J0 = k_J0
+        self.A_w = A_w
+        self.T_osc = T_osc
+        self.z_init = z_init
+
+        # Step and half-step grid in u = ln(1+z), descending to 0
+        self._u_max = np.log1p(z_init)
+        self._u = self._u_max * (1 - np.arange(2 * n_steps + 1) / (2 * n_steps))
+        P, Q = _growth_coefficients(
+            self._u[::-1], np.array([omega_m]), np.array([A_w]), np.array([T_osc])
+        )
+        self._P, self._Q = P[::-1], Q[::-1]
+
+    def jeans_scale(self, z: np.ndarray) -> np.ndarray:
+        """
+        Jeans wavenumber k_J(z) = k_J0 (1+z)^(-1/4) in Mpc⁻¹.
+        """
+        return self.k_J0 * (1 + np.asarray(z, dtype=float)) ** -0.25
+
+    def clustering_fraction(self, k: np.ndarray, z: np.ndarray) -> np.ndarray:
+        """
+        Fraction μ(k, z) of the matter that sources growth.
+
+        Parameters
+        ----------
+        k : array-like
+            Wavenumbers in Mpc⁻¹, shape (n_k,)
+        z : array-like
+            Redshifts, shape (n_z,)
+
+        Returns
+        -------
+        mu : array
+            Shape (n_z, n_k)
+        """
+        k2 = np.asarray(k, dtype=float) ** 2
+        kJ2 = self.jeans_scale(z)[..., None] ** 2
+        return 1 - self.f_osc * k2 / (k2 + kJ2)
+
+    def growth_table(self, k: np.ndarray, z: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Solve D(k, z) for all modes at once.
+
+        Parameters
+        ----------
+        k : array-like
+            Wavenumbers in Mpc⁻¹, shape (n_k,)
+        z : array-like
+            Output redshifts in [0, z_init], shape (n_z,)
+
+        Returns
+        -------
+        table : dict
+            'k' and 'z'; 'D', shape (n_k, n_z), normalized to the
+            scale-independent (k → 0) growth today, so that
+            P(k, z) = P(k, 0) D(k, z)² for a z = 0 spectrum computed with
+            all dark matter clustering; and 'f' = d ln D/d ln a, shape
+            (n_k, n_z)
+        """
+        k = np.atleast_1d(np.asarray(k, dtype=float))
+        z = np.atleast_1d(np.asarray(z, dtype=float))
+        if np.any(z < 0) or np.any(z > self.z_init):
+            raise ValueError(f"Redshift outside solved range [0, {self.z_init}]")
+
+        # k = 0 reference column gives the scale-independent normalization
+        k_all = np.append(k, 0.0)
+        mu = self.clustering_fraction(k_all, np.expm1(self._u))
+        Q = self._Q * mu
+
+        # All modes start at D = a with the growing-mode rate d ln D/d ln a = p
+        # of D'' + D'/2 = 3/2 μ D in matter domination
+        p = (np.sqrt(1 + 24 * mu[0]) - 1) / 4
+        D_init = np.full(k_all.shape, 1 / (1 + self.z_init))
+        D_out, dD_out, D_today = _integrate_growth(
+            self._P, Q, self._u_max, z, D_init, p * D_init
+        )
+
+        return {
+            "k": k,
+            "z": z,
+            "D": (D_out[:, :-1] / D_today[-1]).T,
+            "f": (dD_out[:, :-1] / D_out[:, :-1]).T,
+        }
+
+
+def main():
+    """
+    Tabulate and time scale-dependent growth for 512 k modes.
+    """
+    import time
+
+    print("Scale-Dependent Growth")
+    print("======================")
+
+    k = np.logspace(-4, 1, 512)
+    z = np.linspace(0, 3, 31)
+
+    start = time.perf_counter()
+    growth = ScaleDependentGrowth()
+    table = growth.growth_table(k, z)
+    elapsed = time.perf_counter() - start
+    print(f"{len(k)} k modes × {len(z)} redshifts in {elapsed * 1e3:.1f} ms")
+
+    print()
+    print("k [Mpc⁻¹]   D(k, 0)   D(k, 1)   f(k, 0)")
+    print("-" * 40)
+    for i in np.searchsorted(k, [1e-4, 1e-2, 0.1, 1.0, 10.0]).clip(0, len(k) - 1):
+        print(
+            f"{k[i]:<11.2e} {table['D'][i, 0]:<9.4f} "
+            f"{table['D'][i, 10]:<9.4f} {table['f'][i, 0]:.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
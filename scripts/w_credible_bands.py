@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Posterior-Predictive w(z) Credible Bands
+========================================
+
+Streams posterior samples of the oscillating brane model through the
+BraneOscillator w(z) model and accumulates per-redshift quantile sketches,
+so 68%/95% bands can be computed for arbitrarily long chains without ever
+holding the full sample × redshift matrix in memory.
+"""
+
+import os
+import sys
+import zipfile
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from brane_dynamics import BraneOscillator
+
+# Column layout of chains_osc, see BayesianAnalyzer.param_names_osc
+PARAM_NAMES_OSC = ["tau_0", "f_osc", "T", "A_w"]
+
+
+class HistogramQuantileSketch:
+    """
+    Fixed-range histogram per redshift with online updates.
+
+    Quantiles are interpolated linearly inside a bin, so their resolution
+    is (hi - lo) / n_bins. Memory is n_z × n_bins counters, independent of
+    the number of samples.
+    """
+
+    def __init__(self, n_z: int, lo: float, hi: float, n_bins: int = 4096):
+        """
+        Parameters
+        ----------
+        n_z : int
+            Number of redshifts
+        lo, hi : float
+            Value range covered by the histogram
+        n_bins : int
+            Number of bins per redshift
+        """
+        self.n_z = n_z
+        self.lo = lo
+        self.hi = hi
+        self.n_bins = n_bins
+        self.width = (hi - lo) / n_bins
+        self.counts = np.zeros((n_z, n_bins), dtype=np.int64)
+        self.n = 0
+        self._offsets = np.arange(n_z) * n_bins
+
+    def update(self, values: np.ndarray):
+        """
+        Add a block of samples.
+
+        Parameters
+        ----------
+        values : array
+            Shape (n_samples, n_z); values outside [lo, hi] are clipped
+            into the edge bins
+        """
+        idx = ((values - self.lo) / self.width).astype(np.int64)
+        np.clip(idx, 0, self.n_bins - 1, out=idx)
+        idx += self._offsets
+        self.counts += np.bincount(
+            idx.ravel(), minlength=self.n_z * self.n_bins
+        ).reshape(self.n_z, self.n_bins)
+        self.n += values.shape[0]
+
+    def quantile(self, q: float) -> np.ndarray:
+        """
+        Estimate the q-quantile at every redshift.
+
+        Returns
+        -------
+        values : array
+            Shape (n_z,)
+        """
+        cdf = np.cumsum(self.counts, axis=1)
+        target = q * self.n
+        k = np.minimum((cdf < target).sum(axis=1), self.n_bins - 1)
+        rows = np.arange(self.n_z)
+        below = np.where(k > 0, cdf[rows, k - 1], 0)
+        in_bin = np.maximum(self.counts[rows, k], 1)
+        frac = np.clip((target - below) / in_bin, 0, 1)
+        return self.lo + (k + frac) * self.width
+
+
+def _read_npy_header(f):
+    """Shape and dtype of an `.npy` stream, leaving it at the first row."""
+    version = np.lib.format.read_magic(f)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+    if fortran_order:
+        raise ValueError("Fortran-ordered chains cannot be streamed by rows")
+    return shape, dtype
+
+
+def chain_shape(chains, key: str = "chains_osc") -> Tuple[int, ...]:
+    """
+    Shape of a posterior chain, read from the array header only.
+
+    Parameters
+    ----------
+    chains : str or array
+        Chain source, see `iter_chain_chunks`
+    key : str
+        Array name inside a `.npz` file
+    """
+    if not isinstance(chains, str):
+        return np.shape(chains)
+    if chains.endswith(".npy"):
+        return np.load(chains, mmap_mode="r").shape
+    with zipfile.ZipFile(chains) as archive, archive.open(f"{key}.npy") as f:
+        return _read_npy_header(f)[0]
+
+
+def iter_chain_chunks(
+    chains, key: str = "chains_osc", chunk_size: int = 100_000
+) -> Iterator[np.ndarray]:
+    """
+    Yield row blocks of a posterior chain.
+
+    Only one block is resident at a time: `.npy` files are memory-mapped
+    and `.npz` members are read (and, if compressed, decompressed) as a
+    stream.
+
+    Parameters
+    ----------
+    chains : str or array
+        Path to a `.npz` file written by `bayesian_analysis.main`, a `.npy`
+        file, or an array of shape (n_samples, n_params)
+    key : str
+        Array name inside a `.npz` file
+    chunk_size : int
+        Rows per block
+    """
+    if isinstance(chains, str) and not chains.endswith(".npy"):
+        with zipfile.ZipFile(chains) as archive, archive.open(f"{key}.npy") as f:
+            shape, dtype = _read_npy_header(f)
+            row_shape = shape[1:]
+            row_bytes = dtype.itemsize * int(np.prod(row_shape))
+            for start in range(0, shape[0], chunk_size):
+                n = min(chunk_size, shape[0] - start)
+                block = f.read(n * row_bytes)
+                yield np.frombuffer(block, dtype=dtype).reshape((n,) + row_shape)
+        return
+
+    if isinstance(chains, str):
+        chains = np.load(chains, mmap_mode="r")
+    for start in range(0, len(chains), chunk_size):
+        yield np.asarray(chains[start : start + chunk_size])
+
+
+def posterior_w_bands(
+    chains,
+    z: np.ndarray,
+    levels: Sequence[float] = (0.68, 0.95),
+    chunk_size: int = 100_000,
+    n_bins: int = 4096,
+    A_w_max: Optional[float] = None,
+    brane: Optional[BraneOscillator] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Streaming posterior-predictive credible bands on w(z).
+
+    Parameters
+    ----------
+    chains : str or array
+        Chain source, see `iter_chain_chunks`
+    z : array-like
+        Redshift grid
+    levels : sequence of float
+        Credible levels of the central bands
+    chunk_size : int
+        Samples evaluated per block
+    n_bins : int
+        Histogram bins per redshift
+    A_w_max : float, optional
+        Upper bound on |A_w| in the chain. Since |w + 1| ≤ |A_w| this fixes
+        the histogram range; if omitted it is found with a cheap pass over
+        the A_w column only.
+    brane : BraneOscillator, optional
+        Model providing the shared time–redshift conversion
+
+    Returns
+    -------
+    bands : dict
+        'z', 'median' and, for each level p, 'lower_<p>' and 'upper_<p>'
+        (e.g. 'lower_68'), each of shape (n_z,)
+    """
+    z = np.atleast_1d(z)
+    brane = brane or BraneOscillator()
+    i_T = PARAM_NAMES_OSC.index("T")
+    i_A = PARAM_NAMES_OSC.index("A_w")
+
+    if A_w_max is None:
+        A_w_max = max(
+            np.max(np.abs(chunk[:, i_A]))
+            for chunk in iter_chain_chunks(chains, chunk_size=chunk_size)
+        )
+    pad = 1e-3 * A_w_max + 1e-12
+    sketch = HistogramQuantileSketch(
+        len(z), -1.0 - A_w_max - pad, -1.0 + A_w_max + pad, n_bins
+    )
+
+    for chunk in iter_chain_chunks(chains, chunk_size=chunk_size):
+        for _, w in brane.iter_equation_of_state_ensemble(
+            z, chunk[:, i_T], chunk[:, i_A]
+        ):
+            sketch.update(w)
+
+    bands = {"z": z, "median": sketch.quantile(0.5)}
+    for level in levels:
+        tag = f"{100 * level:.0f}"
+        bands[f"lower_{tag}"] = sketch.quantile(0.5 - level / 2)
+        bands[f"upper_{tag}"] = sketch.quantile(0.5 + level / 2)
+
+    return bands
+
+
+def plot_w_bands(bands: Dict[str, np.ndarray], save_path="plots/w_z_bands.png"):
+    """
+    Plot the 68% and 95% w(z) credible bands.
+    """
+    z = bands["z"]
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    ax.fill_between(
+        z, bands["lower_95"], bands["upper_95"], alpha=0.3, color="blue", label="95%"
+    )
+    ax.fill_between(
+        z, bands["lower_68"], bands["upper_68"], alpha=0.5, color="blue", label="68%"
+    )
+    ax.plot(z, bands["median"], "b-", linewidth=2, label="Median")
+    ax.axhline(y=-1, color="r", linestyle="--", label="Cosmological constant")
+
+    ax.set_xlabel("Redshift z", fontsize=14)
+    ax.set_ylabel("w(z)", fontsize=14)
+    ax.set_title("Posterior-Predictive Dark Energy Equation of State", fontsize=16)
+    ax.legend(fontsize=12)
+    ax.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    plt.savefig(save_path, dpi=150, bbox_inches="tight")
+    print(f"w(z) bands saved to {save_path}")
+
+    return fig
+
+
+def main():
+    """
+    Compute w(z) credible bands from saved posterior chains.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Posterior-predictive w(z) credible bands"
+    )
+    parser.add_argument(
+        "chains",
+        nargs="?",
+        default="posterior_v4.npz",
+        help="Posterior file (.npz with chains_osc, or .npy chain)",
+    )
+    parser.add_argument("--z-max", type=float, default=2.0, help="Maximum redshift")
+    parser.add_argument("--n-z", type=int, default=1000, help="Number of redshifts")
+    parser.add_argument(
+        "--chunk-size", type=int, default=100_000, help="Samples per block"
+    )
+    args = parser.parse_args()
+
+    z = np.linspace(0, args.z_max, args.n_z)
+    bands = posterior_w_bands(args.chains, z, chunk_size=args.chunk_size)
+
+    print("w(z) posterior-predictive bands")
+    print("=" * 40)
+    print("z      median     68% band")
+    print("-" * 40)
+    for i in np.linspace(0, len(z) - 1, 5).astype(int):
+        print(
+            f"{z[i]:<6.2f} {bands['median'][i]:<10.5f} "
+            f"[{bands['lower_68'][i]:.5f}, {bands['upper_68'][i]:.5f}]"
+        )
+
+    plot_w_bands(bands)
+
+
+if __name__ == "__main__":
+    main()